@@ -17,7 +17,9 @@
 
 import os
 import jwt
+import time
 import uuid
+import hashlib
 
 from datetime import datetime, timezone
 
@@ -30,16 +32,22 @@ from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.backends import default_backend
 from cryptography.exceptions import InvalidKey
 
-from sqlalchemy.orm import sessionmaker
 
 import app.settings as settings
+from app.cache import TTLCache
 from app.components.settings import Settings
-from app.database_setup import default_engine
-from app.models.api_token import ApiToken
+from app.database_setup import SessionLocalDefault
+from app.models.api_token import ApiToken, ApitokenState, hash_token
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=settings.TOKEN_AUTH_URL, auto_error=False)
 
+# Maps token (or jti) hash to (state, till); must be invalidated whenever a token changes
+api_token_cache = TTLCache(settings.API_TOKEN_CACHE_SIZE, settings.API_TOKEN_CACHE_TTL)
+
+# Maps sha256 of a JWT to its verified payload, entries never outlive the token's exp
+jwt_cache = TTLCache(settings.JWT_CACHE_SIZE, settings.JWT_CACHE_TTL)
+
 
 class KeyCache:
     public_key = None
@@ -86,11 +94,20 @@ def verify_api_token(token):
     if not token:
         raise ValueError("token is invalid")
 
-    session = sessionmaker(bind=default_engine)()
-    api_token = session.query(ApiToken).filter(ApiToken.token == token).first()
-    session.close()
-
-    if not api_token or api_token.state != 1 or api_token.expired:
+    token_hash = hash_token(token)
+    entry = api_token_cache.get(token_hash)
+    if entry is None:
+        with SessionLocalDefault() as session:
+            entry = session.query(ApiToken.state, ApiToken.till).filter(
+                ApiToken.token_hash == token_hash
+            ).first()
+        if not entry:
+            raise InvalidTokenError("token not accepted")
+        entry = tuple(entry)
+        api_token_cache.set(token_hash, entry)
+
+    state, till = entry
+    if state != ApitokenState.VAILD or (till != 0 and till < time.time()):
         raise InvalidTokenError("token not accepted")
 
 
@@ -103,28 +120,41 @@ async def authenticate(token: str = Depends(oauth2_scheme)):
     if Settings().api_authentication:
         if not token:
             raise credentials_exception
-        try:
-            jwt.get_unverified_header(token)
-        except Exception:
+        key = hashlib.sha256(token.encode()).digest()
+        payload = jwt_cache.get(key)
+        if payload is None:
             try:
-                verify_api_token(token)
-            except (InvalidTokenError, ValueError):
-                raise credentials_exception
-        else:
-            public_key = load_public_key_from_file()
+                jwt.get_unverified_header(token)
+            except Exception:
+                try:
+                    verify_api_token(token)
+                except (InvalidTokenError, ValueError):
+                    raise credentials_exception
+                return
             try:
-                payload = jwt.decode(
-                    token,
-                    public_key,
-                    algorithms = settings.ALGORITHM,
-                    audience = ["api", "ui"],
-                    options = {"verify_aud": True, "strict_aud": False, "verify_jti": False}
-                )
-                if payload["aud"] == "api":
-                    verify_api_token(payload.get("jti"))
-                return payload
+                payload = decode_token(token)
             except (InvalidTokenError, ValueError) as e:
                 raise credentials_exception
+            jwt_cache.set(
+                key, payload, ttl=payload["exp"] - time.time() if "exp" in payload else None
+            )
+        try:
+            # Revocation of API tokens is checked on every request
+            if payload["aud"] == "api":
+                verify_api_token(payload.get("jti"))
+        except (InvalidTokenError, ValueError):
+            raise credentials_exception
+        return dict(payload)
+
+
+def decode_token(token):
+    return jwt.decode(
+        token,
+        load_public_key_from_file(),
+        algorithms = settings.ALGORITHM,
+        audience = ["api", "ui"],
+        options = {"verify_aud": True, "strict_aud": False, "verify_jti": False}
+    )
 
 
 def create_access_token(aud, sub=None, jti=None, expires_delta=None):
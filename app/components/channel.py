@@ -17,24 +17,24 @@
 
 import json
 import cbor2
+import asyncio
 
 from zmq.error import ZMQError;
 from json.decoder import JSONDecodeError
 
 import app.settings as app_settings
-from app.utils import send_zmq_request, run_privileged_command
+from app.utils import run_privileged_command
+from app.zmq_client import zmq_request
 from app.components import status
 
 
 class Channel:
     _CACHE = {}
 
-
     def __init__(self):
         pass
 
-
-    def _get_channel_type(self, channel_id):
+    async def _get_channel_type(self, channel_id):
         # Special case
         if channel_id in ("lora_basic_station_ws", "lora_basic_station_wss"):
             return "lora"
@@ -43,7 +43,7 @@ class Channel:
         try:
             channel = self._CACHE[channel_id]
         except KeyError:
-            self.list()
+            await self.list()
             channel = self._CACHE.get(channel_id)
         try:
             return channel["type"]
@@ -57,19 +57,24 @@ class Channel:
             return app_settings.ZMQ_M2EB_SOCKET
         raise KeyError("Unknown channel type!")
 
-
-    def list(self):
-        request = cbor2.dumps(['GET', 'channel/'])
-        try:
-            m_channels = send_zmq_request(app_settings.ZMQ_MQBC_SOCKET, request)
-            m_channels = json.loads(m_channels)
-        except (ZMQError, JSONDecodeError):
-            m_channels = []
+    async def _list_backend(self, socket, request):
         try:
-            h_channels = send_zmq_request(app_settings.ZMQ_M2EB_SOCKET, request)
-            h_channels = json.loads(h_channels)
+            return json.loads(await zmq_request(socket, request)), "ok"
         except (ZMQError, JSONDecodeError):
-            h_channels = []
+            return [], "unavailable"
+
+    async def list(self):
+        # Backends are queried concurrently; one that does not answer contributes
+        # no channels and is reported as unavailable
+        request = cbor2.dumps(['GET', 'channel/'])
+        (m_channels, m_status), (h_channels, h_status), ws_status, wss_status = (
+            await asyncio.gather(
+                self._list_backend(app_settings.ZMQ_MQBC_SOCKET, request),
+                self._list_backend(app_settings.ZMQ_M2EB_SOCKET, request),
+                asyncio.to_thread(status.service_registry.status, "chirpstack-gateway-bridge-ws"),
+                asyncio.to_thread(status.service_registry.status, "chirpstack-gateway-bridge-wss"),
+            )
+        )
 
         for channel in m_channels:
             channel["type"] = "mqtt"
@@ -84,59 +89,63 @@ class Channel:
                 "id": "lora_basic_station_ws",
                 "type": "lora",
                 "state": "CONFIGURED",
-                "enabled": status.get_service_status("chirpstack-gateway-bridge-ws") == status.ServiceStatus.RUNNING
+                "enabled": ws_status == status.ServiceStatus.RUNNING
             },
             {
                 "id": "lora_basic_station_wss",
                 "type": "lora",
                 "state": "CONFIGURED",
-                "enabled": status.get_service_status("chirpstack-gateway-bridge-wss") == status.ServiceStatus.RUNNING
+                "enabled": wss_status == status.ServiceStatus.RUNNING
             }
         ]
+        l_status = (
+            "unavailable" if status.ServiceStatus.MALFORMED in (ws_status, wss_status) else "ok"
+        )
 
-        return json.dumps(m_channels + h_channels + l_channels)
-
+        backends = {"mqbc": m_status, "m2eb": h_status, "lora": l_status}
+        return m_channels + h_channels + l_channels, backends
 
-    def get(self, channel_id):
+    async def get(self, channel_id):
         try:
-            channel_type = self._get_channel_type(channel_id)
+            channel_type = await self._get_channel_type(channel_id)
         except KeyError:
             return None
 
         # Special case for LoRaWAN (temp)
         if channel_type == "lora":
             if channel_id == "lora_basic_station_ws":
-                return json.dumps({
-                    "id": "lora_basic_station_ws",
-                    "type": "lora",
-                    "authtype": "none",
-                    "state": "CONFIGURED",
-                    "enabled": status.get_service_status("chirpstack-gateway-bridge-ws") == status.ServiceStatus.RUNNING,
-                    "ports": (
-                        {"port": 3001, "descr": "TCP"},
-                    )
-                })
+                return json.dumps(
+                    {
+                        "id": "lora_basic_station_ws",
+                        "type": "lora",
+                        "authtype": "none",
+                        "state": "CONFIGURED",
+                        "enabled": status.service_registry.status("chirpstack-gateway-bridge-ws")
+                        == status.ServiceStatus.RUNNING,
+                        "ports": ({"port": 3001, "descr": "TCP"},),
+                    }
+                )
             elif channel_id == "lora_basic_station_wss":
-                return json.dumps({
-                    "id": "lora_basic_station_wss",
-                    "type": "lora",
-                    "authtype": "none",
-                    "state": "CONFIGURED",
-                    "enabled": status.get_service_status("chirpstack-gateway-bridge-wss") == status.ServiceStatus.RUNNING,
-                    "ports": (
-                        {"port": 8887, "descr": "TLS"},
-                    )
-                })
+                return json.dumps(
+                    {
+                        "id": "lora_basic_station_wss",
+                        "type": "lora",
+                        "authtype": "none",
+                        "state": "CONFIGURED",
+                        "enabled": status.service_registry.status("chirpstack-gateway-bridge-wss")
+                        == status.ServiceStatus.RUNNING,
+                        "ports": ({"port": 8887, "descr": "TLS"},),
+                    }
+                )
 
         request = cbor2.dumps(['GET', 'channel/' + channel_id])
         socket = self._get_socket(channel_type)
-        response = send_zmq_request(socket, request)
+        response = await zmq_request(socket, request)
         if type(response) == bytes:
             response = response.decode()
         return response
 
-
-    def create(self, channel_id, payload):
+    async def create(self, channel_id, payload):
         try:
             channel_type = payload["type"]
         except KeyError:
@@ -144,15 +153,14 @@ class Channel:
 
         request = cbor2.dumps(['POST', 'channel/' + channel_id, json.dumps(payload)])
         socket = self._get_socket(channel_type)
-        response = send_zmq_request(socket, request)
+        response = await zmq_request(socket, request)
         if type(response) == bytes:
             response = response.decode()
         return response
 
-
-    def update(self, channel_id, payload):
+    async def update(self, channel_id, payload):
         try:
-            channel_type = self._get_channel_type(channel_id)
+            channel_type = await self._get_channel_type(channel_id)
         except KeyError:
             raise KeyError("Channel not found")
 
@@ -172,26 +180,28 @@ class Channel:
                 else:
                     run_privileged_command(['systemctl', 'stop', 'chirpstack-gateway-bridge-wss'])
                     run_privileged_command(['systemctl', 'disable', 'chirpstack-gateway-bridge-wss'])
+            status.service_registry.refresh(
+                ["chirpstack-gateway-bridge-ws", "chirpstack-gateway-bridge-wss"]
+            )
             return ""
 
         payload = payload if type(payload) in (str, bytes) else json.dumps(payload)
         request = cbor2.dumps(['PUT', 'channel/' + channel_id, payload])
         socket = self._get_socket(channel_type)
-        response = send_zmq_request(socket, request)
+        response = await zmq_request(socket, request)
         if type(response) == bytes:
             return response.decode()
         return response
 
-
-    def delete(self, channel_id):
+    async def delete(self, channel_id):
         try:
-            channel_type = self._get_channel_type(channel_id)
+            channel_type = await self._get_channel_type(channel_id)
         except KeyError:
             raise KeyError("Channel not found")
         request = cbor2.dumps(['DELETE', 'channel/' + channel_id])
         socket = self._get_socket(channel_type)
         try:
-            response = send_zmq_request(socket, request)
+            response = await zmq_request(socket, request)
             if type(response) == bytes:
                 return response.decode()
             return response
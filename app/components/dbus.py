@@ -0,0 +1,290 @@
+# SPDX-License-Identifier: Apache-2.0
+
+# Copyright (c) 2026 Pluraf Embedded AB <code@pluraf.com>
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import threading
+import ipaddress
+
+import app.settings as app_settings
+
+from app.utils import get_mode, GNodeMode
+
+try:
+    from jeepney import DBusAddress, DBusErrorResponse, new_method_call
+    from jeepney.wrappers import unwrap_msg
+    from jeepney.io.blocking import open_dbus_connection
+except ImportError:  # Subprocess backends are used instead
+    open_dbus_connection = None
+
+
+SYSTEMD = "org.freedesktop.systemd1"
+NM = "org.freedesktop.NetworkManager"
+PROPERTIES = "org.freedesktop.DBus.Properties"
+
+NM_CONNECTION_TYPES = {
+    "802-3-ethernet": "ethernet",
+    "802-11-wireless": "wifi",
+}
+
+NM_802_11_AP_FLAGS_PRIVACY = 0x1
+NM_802_11_AP_SEC_KEY_MGMT_802_1X = 0x200
+NM_802_11_AP_SEC_KEY_MGMT_SAE = 0x400
+
+
+class DbusError(Exception):
+    pass
+
+
+class SystemBus:
+    # One persistent connection to the system bus, shared by all backends.
+    # Blocking jeepney connections are not thread safe, hence the lock.
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._connection is None:
+            self._connection = open_dbus_connection(bus="SYSTEM")
+        return self._connection
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def call(self, bus_name, path, interface, method, signature=None, body=()):
+        message = new_method_call(DBusAddress(path, bus_name, interface), method, signature, body)
+        with self._lock:
+            try:
+                reply = self._connect().send_and_get_reply(message, timeout=self.timeout)
+            except (OSError, TimeoutError) as e:
+                # Reconnect on the next call
+                if self._connection is not None:
+                    self._connection.close()
+                    self._connection = None
+                raise DbusError(str(e))
+        try:
+            return unwrap_msg(reply)
+        except DBusErrorResponse as e:
+            raise DbusError(str(e))
+
+    def get_property(self, bus_name, path, interface, name):
+        return self.call(bus_name, path, PROPERTIES, "Get", "ss", (interface, name))[0][1]
+
+    def get_all(self, bus_name, path, interface):
+        properties = self.call(bus_name, path, PROPERTIES, "GetAll", "s", (interface,))[0]
+        return {name: value[1] for name, value in properties.items()}
+
+
+def connect_system_bus(timeout):
+    # Returns None when D-Bus can not be used on this host
+    if open_dbus_connection is None:
+        return None
+    bus = SystemBus(timeout)
+    try:
+        bus.call("org.freedesktop.DBus", "/org/freedesktop/DBus", "org.freedesktop.DBus", "GetId")
+    except DbusError:
+        return None
+    return bus
+
+
+class BusCache:
+    bus = None
+    probed = False
+    lock = threading.Lock()
+
+
+def get_system_bus():
+    # None selects the subprocess backends. With GNODE_SYSTEM_BACKEND=dbus
+    # there is no such fallback, an unreachable bus is an error.
+    if app_settings.SYSTEM_BACKEND not in ("auto", "dbus", "subprocess"):
+        raise ValueError("GNODE_SYSTEM_BACKEND must be auto, dbus or subprocess")
+    with BusCache.lock:
+        if not BusCache.probed:
+            if app_settings.SYSTEM_BACKEND != "subprocess":
+                BusCache.bus = connect_system_bus(app_settings.DBUS_TIMEOUT)
+            BusCache.probed = True
+        if BusCache.bus is None and app_settings.SYSTEM_BACKEND == "dbus":
+            raise DbusError("GNODE_SYSTEM_BACKEND is dbus, but the system bus is not reachable")
+        return BusCache.bus
+
+
+def use_system_bus():
+    # Supervisor based (virtual) nodes have no systemd or NetworkManager on
+    # the bus, unless D-Bus is requested explicitly
+    return get_mode() == GNodeMode.PHYSICAL or app_settings.SYSTEM_BACKEND == "dbus"
+
+
+class SystemdClient:
+    def __init__(self, bus):
+        self.bus = bus
+
+    def units_properties(self, service_names):
+        units = {}
+        for service_name in service_names:
+            unit_path = self.bus.call(
+                SYSTEMD, "/org/freedesktop/systemd1", SYSTEMD + ".Manager", "LoadUnit", "s",
+                (service_name if "." in service_name else service_name + ".service",)
+            )[0]
+            units[service_name] = self.bus.get_all(SYSTEMD, unit_path, SYSTEMD + ".Unit")
+        return units
+
+
+class NetworkManagerClient:
+    # Returns the same structures as the nmcli based functions in network_connections
+
+    def __init__(self, bus):
+        self.bus = bus
+
+    def _get(self, path, interface, name):
+        return self.bus.get_property(NM, path, interface, name)
+
+    def _state(self, name):
+        enabled = self._get("/org/freedesktop/NetworkManager", NM, name)
+        return "enabled" if enabled else "disabled"
+
+    def wifi_state(self):
+        return self._state("WirelessEnabled")
+
+    def networking_state(self):
+        return self._state("NetworkingEnabled")
+
+    def _devices(self):
+        return self.bus.call(NM, "/org/freedesktop/NetworkManager", NM, "GetDevices")[0]
+
+    def _interface(self, device_path):
+        return self._get(device_path, NM + ".Device", "Interface")
+
+    def available_wifi(self):
+        networks = []
+        for device_path in self._devices():
+            if self._get(device_path, NM + ".Device", "DeviceType") != 2:  # NM_DEVICE_TYPE_WIFI
+                continue
+            device_name = self._interface(device_path)
+            ap_paths = self.bus.call(
+                NM, device_path, NM + ".Device.Wireless", "GetAllAccessPoints"
+            )[0]
+            for ap_path in ap_paths:
+                ap = self.bus.get_all(NM, ap_path, NM + ".AccessPoint")
+                networks.append({
+                    "ssid": bytes(ap["Ssid"]).decode(errors="replace"),
+                    "security": ap_security(ap["Flags"], ap["WpaFlags"], ap["RsnFlags"]),
+                    "device": device_name,
+                    "signal": str(ap["Strength"]),
+                    "rate": "{} Mbit/s".format(ap["MaxBitrate"] // 1000)
+                })
+        return networks
+
+    def _connection_settings(self, settings_path):
+        settings = self.bus.call(NM, settings_path, NM + ".Settings.Connection", "GetSettings")[0]
+        return {group: {key: value[1] for key, value in values.items()}
+                for group, values in settings.items()}
+
+    def _active_connections(self):
+        active = []
+        paths = self._get("/org/freedesktop/NetworkManager", NM, "ActiveConnections")
+        for path in paths:
+            connection = self.bus.get_all(NM, path, NM + ".Connection.Active")
+            devices = connection["Devices"]
+            connection["device_path"] = devices[0] if devices else None
+            active.append(connection)
+        return active
+
+    def available_ethernet(self):
+        active_devices = {
+            connection["Connection"]: self._interface(connection["device_path"])
+            for connection in self._active_connections() if connection["device_path"]
+        }
+        connections = []
+        settings_paths = self.bus.call(
+            NM, "/org/freedesktop/NetworkManager/Settings", NM + ".Settings", "ListConnections"
+        )[0]
+        for settings_path in settings_paths:
+            settings = self._connection_settings(settings_path)["connection"]
+            if settings["type"] != "802-3-ethernet":
+                continue
+            connections.append({
+                "name": settings["id"],
+                "type": "ethernet",
+                "device": active_devices.get(settings_path, "")
+            })
+        return connections
+
+    def active_connections(self, types):
+        connections = []
+        for connection in self._active_connections():
+            connection_type = NM_CONNECTION_TYPES.get(connection["Type"], connection["Type"])
+            if connection_type not in types or not connection["device_path"]:
+                continue
+            device_name = self._interface(connection["device_path"])
+            settings = self._connection_settings(connection["Connection"])
+            connections.append({
+                "name": connection["Id"],
+                "type": connection_type,
+                "device": device_name,
+                "ipv4_method": settings.get("ipv4", {}).get("method", ""),
+                "ipv4_settings": self._ipv4_settings(connection["device_path"])
+            })
+        return connections
+
+    def default_device(self):
+        primary = self._get("/org/freedesktop/NetworkManager", NM, "PrimaryConnection")
+        if primary == "/":
+            return None
+        devices = self._get(primary, NM + ".Connection.Active", "Devices")
+        return self._interface(devices[0]) if devices else None
+
+    def ipv4_settings(self, device_name):
+        device_path = self.bus.call(
+            NM, "/org/freedesktop/NetworkManager", NM, "GetDeviceByIpIface", "s", (device_name,)
+        )[0]
+        return self._ipv4_settings(device_path)
+
+    def _ipv4_settings(self, device_path):
+        ipv4_settings = {}
+        config_path = self._get(device_path, NM + ".Device", "Ip4Config")
+        config = self.bus.get_all(NM, config_path, NM + ".IP4Config") if config_path != "/" else {}
+        addresses = [{key: value[1] for key, value in address.items()}
+                     for address in config.get("AddressData", [])]
+        if addresses:
+            interface = ipaddress.IPv4Interface(
+                "{}/{}".format(addresses[0]["address"], addresses[0]["prefix"])
+            )
+            ipv4_settings["address"] = str(interface.ip)
+            ipv4_settings["netmask"] = str(interface.network.netmask)
+        ipv4_settings["gateway"] = config.get("Gateway", "")
+        nameservers = config.get("NameserverData", [])
+        ipv4_settings["dns"] = nameservers[0]["address"][1] if nameservers else None
+        return ipv4_settings
+
+
+def ap_security(flags, wpa_flags, rsn_flags):
+    # Mirrors the SECURITY column of nmcli
+    security = []
+    if flags & NM_802_11_AP_FLAGS_PRIVACY and not wpa_flags and not rsn_flags:
+        security.append("WEP")
+    if wpa_flags:
+        security.append("WPA1")
+    if rsn_flags & NM_802_11_AP_SEC_KEY_MGMT_SAE:
+        security.append("WPA3")
+    elif rsn_flags:
+        security.append("WPA2")
+    if (wpa_flags | rsn_flags) & NM_802_11_AP_SEC_KEY_MGMT_802_1X:
+        security.append("802.1X")
+    return " ".join(security)
@@ -0,0 +1,147 @@
+# SPDX-License-Identifier: Apache-2.0
+
+# Copyright (c) 2026 Pluraf Embedded AB <code@pluraf.com>
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import base64
+import asyncio
+
+from sqlalchemy import func
+from sqlalchemy.orm import load_only
+
+import app.settings as app_settings
+
+from app.components import preview as preview_component
+from app.components.sensor_store import parse_sensor_data
+from app.database_setup import SessionLocalDefault
+from app.models.device import DeviceData
+
+
+class Subscriber:
+    def __init__(self, device_id, preview):
+        self.device_id = device_id
+        self.preview = preview
+        self.queue = asyncio.Queue(maxsize=app_settings.FRAME_FEED_QUEUE_SIZE)
+
+    def put(self, event):
+        # A slow client loses its oldest events rather than holding back the feed
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+
+class FrameFeed:
+    # Tails device_data with one cursor and fans new frames out to all
+    # subscribers, so live clients cost no queries of their own
+
+    def __init__(self):
+        self.subscribers = set()
+        self.cursor = None
+        self.task = None
+
+    def subscribe(self, device_id, preview=False):
+        subscriber = Subscriber(device_id, preview)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run(app_settings.FRAME_FEED_POLL_INTERVAL))
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def run(self, interval):
+        # Stops by itself once the last subscriber is gone
+        while self.subscribers:
+            try:
+                await self.poll()
+            except Exception as e:
+                print("Frame feed poll failed:", e)
+            await asyncio.sleep(interval)
+        self.cursor = None
+        self.task = None
+
+    async def poll(self):
+        subscribers = list(self.subscribers)
+        devices = {subscriber.device_id for subscriber in subscribers}
+        preview_devices = {
+            subscriber.device_id for subscriber in subscribers if subscriber.preview
+        }
+        events = await asyncio.to_thread(self.fetch, devices, preview_devices)
+        for subscriber in subscribers:
+            for event in events.get(subscriber.device_id, []):
+                if not subscriber.preview:
+                    event = {key: value for key, value in event.items() if key != "preview"}
+                subscriber.put(event)
+
+    def fetch(self, devices, preview_devices):
+        # Returns {device_id: [event, ...]} of frames newer than the cursor.
+        # The first call only positions the cursor at the newest frame.
+        session = SessionLocalDefault()
+        try:
+            if self.cursor is None:
+                self.cursor = session.query(func.max(DeviceData.id)).scalar() or 0
+                return {}
+            rows = (
+                session.query(DeviceData)
+                .options(
+                    load_only(
+                        DeviceData.device_id,
+                        DeviceData.created,
+                        DeviceData.sensor_data,
+                        DeviceData.preview,
+                        DeviceData.blob_ref,
+                    )
+                )
+                .filter(DeviceData.id > self.cursor)
+                .order_by(DeviceData.id)
+                .limit(app_settings.FRAME_FEED_BATCH_SIZE)
+                .all()
+            )
+            events = {}
+            for row in rows:
+                self.cursor = row.id
+                if row.device_id not in devices:
+                    continue
+                event = {
+                    "frame_id": row.id,
+                    "device_id": row.device_id,
+                    "created": row.created.isoformat() if row.created else None,
+                    "sensor_data": parse_sensor_data(row.sensor_data)
+                }
+                if row.device_id in preview_devices:
+                    # Generated once per frame, whatever the number of subscribers.
+                    # A frame that can not be decoded still gets its event,
+                    # failures are counted in PreviewStats.
+                    try:
+                        preview = preview_component.get_preview(
+                            session, row, app_settings.PREVIEW_DEFAULT_WIDTH
+                        )
+                    except Exception:
+                        preview = None
+                    event["preview"] = base64.b64encode(preview).decode() if preview else None
+                events.setdefault(row.device_id, []).append(event)
+            return events
+        finally:
+            session.close()
+
+
+frame_feed = FrameFeed()
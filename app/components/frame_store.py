@@ -0,0 +1,170 @@
+# SPDX-License-Identifier: Apache-2.0
+
+# Copyright (c) 2026 Pluraf Embedded AB <code@pluraf.com>
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+import os
+import fcntl
+import asyncio
+import hashlib
+import tempfile
+import threading
+import contextlib
+
+
+import app.settings as app_settings
+
+from app.database_setup import SessionLocalDefault
+from app.models.device import DeviceData
+
+
+# Held while files are written or unlinked, so a file is never removed
+# between the offloader writing it and committing the reference
+lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def storage_lock():
+    # Every worker process runs the offloader and retention, so the thread
+    # lock is paired with an flock on a file shared by all of them
+    with lock:
+        os.makedirs(app_settings.FRAME_STORAGE_DIR, exist_ok=True)
+        with open(os.path.join(app_settings.FRAME_STORAGE_DIR, ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def frame_path(blob_ref):
+    # Content addressed: <storage>/<first two hex digits>/<sha256>
+    return os.path.join(app_settings.FRAME_STORAGE_DIR, blob_ref[:2], blob_ref)
+
+
+def write_frame(blob):
+    blob_ref = hashlib.sha256(blob).hexdigest()
+    path = frame_path(blob_ref)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(blob)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    return blob_ref
+
+
+def read_frame(row):
+    # Frame payload of a device_data row, wherever it is stored
+    if row.blob is not None or row.blob_ref is None:
+        return row.blob
+    try:
+        with open(frame_path(row.blob_ref), "rb") as frame:
+            return frame.read()
+    except FileNotFoundError:
+        return None
+
+
+def frame_source(row):
+    # Path for offloaded frames, bytes for inline ones
+    return row.blob if row.blob is not None or row.blob_ref is None else frame_path(row.blob_ref)
+
+
+def media_type(head):
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG"):
+        return "image/png"
+    return "application/octet-stream"
+
+
+def unlink_unreferenced(session, blob_refs):
+    blob_refs = set(filter(None, blob_refs))
+    if not blob_refs:
+        return
+    referenced = {blob_ref for blob_ref, in session.query(DeviceData.blob_ref)
+        .filter(DeviceData.blob_ref.in_(blob_refs))
+        .distinct()
+    }
+    for blob_ref in blob_refs - referenced:
+        try:
+            os.unlink(frame_path(blob_ref))
+        except FileNotFoundError:
+            pass
+
+
+def release_frames(session, blob_refs):
+    # Removes files no remaining row refers to. Call after the rows are deleted.
+    if any(blob_refs):
+        with storage_lock():
+            unlink_unreferenced(session, blob_refs)
+
+
+def offload_batch(batch_size, after_id=0):
+    # Moves inline frames with ids above after_id into files.
+    # Returns the number of frames read and the last id seen.
+    session = SessionLocalDefault()
+    try:
+        rows = (session.query(DeviceData.id, DeviceData.blob)
+            .filter(DeviceData.id > after_id, DeviceData.blob.is_not(None))
+            .order_by(DeviceData.id)
+            .limit(batch_size)
+            .all()
+        )
+        # End the read transaction, files are written without holding the database
+        session.rollback()
+        if not rows:
+            return 0, after_id
+        with storage_lock():
+            frames = [(frame_id, write_frame(blob), len(blob)) for frame_id, blob in rows]
+            orphans = []
+            for frame_id, blob_ref, blob_size in frames:
+                updated = session.query(DeviceData).filter(
+                    DeviceData.id == frame_id, DeviceData.blob.is_not(None)
+                ).update(
+                    {"blob": None, "blob_ref": blob_ref, "blob_size": blob_size},
+                    synchronize_session=False
+                )
+                if not updated:
+                    # Deleted meanwhile
+                    orphans.append(blob_ref)
+            session.commit()
+            unlink_unreferenced(session, orphans)
+        return len(rows), rows[-1][0]
+    finally:
+        session.close()
+
+
+def offload_pending():
+    batch_size = app_settings.FRAME_OFFLOAD_BATCH_SIZE
+    count, last_id = offload_batch(batch_size)
+    while count == batch_size:
+        count, last_id = offload_batch(batch_size, last_id)
+
+
+async def run(interval):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(offload_pending)
+        except Exception as e:
+            print("Frame offload failed:", e)
@@ -20,9 +20,29 @@ from fastapi import HTTPException
 import subprocess
 import ipaddress
 import json
+import threading
 
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import app.settings as app_settings
+
+from app.cache import TTLCache
 from app.utils import run_command, run_privileged_command
-from app.components.status import get_service_status, ServiceStatus
+from app.components.status import service_registry, ServiceStatus
+from app.components.dbus import DbusError, NetworkManagerClient, get_system_bus, use_system_bus
+
+
+network_probe_executor = ThreadPoolExecutor(
+    max_workers=app_settings.NETWORK_PROBE_WORKERS, thread_name_prefix="network-probe"
+)
+# Separate pool, so per-connection lookups never wait behind the probes that spawned them
+connection_details_executor = ThreadPoolExecutor(
+    max_workers=app_settings.NETWORK_PROBE_WORKERS, thread_name_prefix="network-connection"
+)
+
+wifi_scan_cache = TTLCache(1, app_settings.WIFI_SCAN_CACHE_TTL)
+wifi_scan_lock = threading.Lock()
+
 
 def get_objects_from_multiline_output(command_response):
     element_list = []
@@ -136,7 +156,7 @@ def get_ipv4_settings(device_name):
     return ipv4_settings
 
 def get_ap_state():
-    if get_service_status("hostapd@SoftAp0") == ServiceStatus.RUNNING:
+    if service_registry.status("hostapd@SoftAp0") == ServiceStatus.RUNNING:
         return "enabled"
     return "disabled"
 
@@ -171,11 +191,11 @@ def get_network_status():
     status["gateway"] = "-"
     status["dns"] = "-"
     try:
-        def_route = get_default_route()
-        if def_route == []:
+        backend = get_network_backend()
+        curr_device = backend.default_device()
+        if curr_device is None:
             return status
-        curr_device = def_route["dev"]
-        return get_ipv4_settings(curr_device)
+        return backend.ipv4_settings(curr_device)
     except subprocess.CalledProcessError as e:
         raise HTTPException(status_code = 500, detail = "Could not get network status!")
 
@@ -206,31 +226,144 @@ def get_current_active_connections(types = []):
     comm_response = run_privileged_command(command)
     connections = get_objects_from_multiline_output(comm_response)
     relevant_connections = [connection for connection in connections if connection['type'] in relevant_types]
-    for connection in relevant_connections:
-        connection['ipv4_method'] = get_ipv4_method(connection['name'])
-        connection['ipv4_settings'] = get_ipv4_settings(connection['device'])
+    methods = [connection_details_executor.submit(get_ipv4_method, connection['name'])
+               for connection in relevant_connections]
+    settings = [connection_details_executor.submit(get_ipv4_settings, connection['device'])
+                for connection in relevant_connections]
+    for connection, method, ipv4_settings in zip(relevant_connections, methods, settings):
+        connection['ipv4_method'] = method.result()
+        connection['ipv4_settings'] = ipv4_settings.result()
     return relevant_connections
 
+class SubprocessNetworkBackend:
+    def wifi_state(self):
+        return get_wifi_state()
+
+    def networking_state(self):
+        return get_ethernet_state()
+
+    def available_wifi(self):
+        return get_available_wifi()
+
+    def available_ethernet(self):
+        return get_available_ethernet()
+
+    def active_connections(self, types = []):
+        return get_current_active_connections(types)
+
+    def default_device(self):
+        route = get_default_route()
+        return route["dev"] if route else None
+
+    def ipv4_settings(self, device_name):
+        return get_ipv4_settings(device_name)
+
+
+class DbusNetworkBackend:
+    # Reads NetworkManager state over D-Bus, falling back to nmcli if the bus
+    # fails, unless GNODE_SYSTEM_BACKEND=dbus
+    def __init__(self, network_manager):
+        self.network_manager = network_manager
+        self.fallback = (
+            SubprocessNetworkBackend() if app_settings.SYSTEM_BACKEND != "dbus" else None
+        )
+
+    def _call(self, method, *args):
+        try:
+            return getattr(self.network_manager, method)(*args)
+        except DbusError:
+            if self.fallback is None:
+                raise
+            return getattr(self.fallback, method)(*args)
+
+    def wifi_state(self):
+        return self._call("wifi_state")
+
+    def networking_state(self):
+        return self._call("networking_state")
+
+    def available_wifi(self):
+        return self._call("available_wifi")
+
+    def available_ethernet(self):
+        return self._call("available_ethernet")
+
+    def active_connections(self, types = []):
+        if not isinstance(types, list):
+            return []
+        return self._call("active_connections", types or ['ethernet', 'wifi'])
+
+    def default_device(self):
+        return self._call("default_device")
+
+    def ipv4_settings(self, device_name):
+        return self._call("ipv4_settings", device_name)
+
+
+class BackendCache:
+    backend = None
+
+
+def get_network_backend():
+    if BackendCache.backend is None:
+        bus = get_system_bus() if use_system_bus() else None
+        if bus is not None:
+            BackendCache.backend = DbusNetworkBackend(NetworkManagerClient(bus))
+        else:
+            BackendCache.backend = SubprocessNetworkBackend()
+    return BackendCache.backend
+
+
+def get_cached_available_wifi(backend):
+    # A scan keeps the radio busy for seconds, so results are reused for WIFI_SCAN_CACHE_TTL
+    networks = wifi_scan_cache.get("scan")
+    if networks is None:
+        with wifi_scan_lock:
+            networks = wifi_scan_cache.get("scan")
+            if networks is None:
+                networks = backend.available_wifi()
+                wifi_scan_cache.set("scan", networks)
+    return networks
+
+def invalidate_wifi_scan():
+    wifi_scan_cache.clear()
+
 def get_netwok_settings():
+    # Probes run concurrently. Failed or timed out probes are left out of
+    # the response and reported through fetching_status.
+    backend = get_network_backend()
+    probes = {
+        "ap_state": get_ap_state,
+        "wifi_state": backend.wifi_state,
+        "ethernet_state": backend.networking_state,
+        "available_wifi": lambda: get_cached_available_wifi(backend),
+        "available_ethernet": backend.available_ethernet,
+        "active_connections": backend.active_connections
+    }
+    futures = {key: network_probe_executor.submit(probe) for key, probe in probes.items()}
+    wait(futures.values(), timeout=app_settings.NETWORK_PROBE_TIMEOUT)
     network_settings = {}
-    try:
-        network_settings["ap_state"] = get_ap_state()
-        network_settings["wifi_state"] = get_wifi_state()
-        network_settings["ethernet_state"] = get_ethernet_state()
-        network_settings["available_wifi"] = get_available_wifi()
-        network_settings["available_ethernet"] = get_available_ethernet()
-        network_settings["active_connections"] = get_current_active_connections()
-        network_settings["fetching_status"] = "success"
-        return network_settings
-    except subprocess.CalledProcessError as e:
-        print(e.stderr.strip())
-        network_settings["fetching_status"] = "failure"
-        return network_settings
+    failed = False
+    for key, future in futures.items():
+        if not future.done():
+            print("Network settings: {} timed out".format(key))
+            failed = True
+            continue
+        try:
+            network_settings[key] = future.result()
+        except subprocess.CalledProcessError as e:
+            print(e.stderr.strip() if e.stderr else e)
+            failed = True
+        except Exception as e:
+            print("Network settings: {} failed: {}".format(key, e))
+            failed = True
+    network_settings["fetching_status"] = "failure" if failed else "success"
+    return network_settings
 
 def set_ipv4_settings(ipv4_method, ipv4_settings, connection_type):
     # current ipv4_settings and user given ipv4_settings match,
     try:
-        current_connection = get_current_active_connections([connection_type])[0]
+        current_connection = get_network_backend().active_connections([connection_type])[0]
     except IndexError:
         raise HTTPException(
             status_code = 400, detail = "No active connections"
@@ -268,16 +401,23 @@ def set_ap_state(on):
     else:
         run_privileged_command(["systemctl", "disable", "hostapd@SoftAp0.service"])
         run_privileged_command(["systemctl", "stop", "hostapd@SoftAp0.service"])
+    service_registry.refresh(["hostapd@SoftAp0"])
 
 def set_wifi_state(on):
-    return run_privileged_command(["nmcli", "radio", "wifi", "on" if on else "off"])
+    try:
+        return run_privileged_command(["nmcli", "radio", "wifi", "on" if on else "off"])
+    finally:
+        invalidate_wifi_scan()
 
 def connect_wifi(ssid, password):
-    connections = get_available_wifi()
+    backend = get_network_backend()
+    # Connecting is rare, so it rescans rather than trusting a stale ssid list
+    invalidate_wifi_scan()
+    connections = get_cached_available_wifi(backend)
     seĺected_connection = [connection for connection in connections if connection['ssid'] == ssid]
     if len(seĺected_connection) == 0 :
         raise HTTPException(status_code = 404, detail = "Network settings: Given ssid is invalid")
-    current_wifi_connection = get_current_active_connections(['wifi'])
+    current_wifi_connection = backend.active_connections(['wifi'])
     #connect to the new wifi network if not conneted
     if len(current_wifi_connection) == 0 or current_wifi_connection[0]['name'] != ssid :
         password_needed = seĺected_connection[0]["security"] != ""
@@ -289,6 +429,7 @@ def connect_wifi(ssid, password):
             command = ['nmcli', 'device', 'wifi', 'connect', ssid, 'password', password]
         try:
             run_privileged_command(command)
+            invalidate_wifi_scan()
         except subprocess.CalledProcessError as e:
             if "property is invalid" in e.stderr or "Secrets were required" in e.stderr:
                 raise HTTPException(status_code=400, detail="Password is invalid")
@@ -0,0 +1,141 @@
+# SPDX-License-Identifier: Apache-2.0
+
+# Copyright (c) 2026 Pluraf Embedded AB <code@pluraf.com>
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import io
+import threading
+import multiprocessing
+
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+from sqlalchemy import exc, update
+
+import app.settings as app_settings
+
+from app.components import frame_store
+from app.database_setup import SessionLocalDefault
+from app.models.device import DeviceData, DevicePreview
+
+
+def make_preview(source, target_width):
+    # source is the image itself or the path of an offloaded frame
+    img = Image.open(source if isinstance(source, str) else io.BytesIO(source))
+
+    w_percent = (target_width / float(img.width))
+    target_height = int((float(img.height) * float(w_percent)))
+    resized_img = img.resize((target_width, target_height), Image.LANCZOS)
+
+    blob_buffer = io.BytesIO()
+    resized_img.save(blob_buffer, format="JPEG")
+
+    return blob_buffer.getvalue()
+
+
+class PreviewStats:
+    hits = 0
+    misses = 0
+    errors = 0
+    lock = threading.Lock()
+
+    @classmethod
+    def count(cls, name):
+        with cls.lock:
+            setattr(cls, name, getattr(cls, name) + 1)
+
+    @classmethod
+    def stats(cls):
+        with cls.lock:
+            lookups = cls.hits + cls.misses
+            return {
+                "hits": cls.hits,
+                "misses": cls.misses,
+                "errors": cls.errors,
+                "hit_rate": cls.hits / lookups if lookups else 0.0
+            }
+
+
+class PreviewPool:
+    # Resizing is CPU bound, so it runs in worker processes, created on first use
+    executor = None
+    lock = threading.Lock()
+
+    @classmethod
+    def get(cls):
+        with cls.lock:
+            if cls.executor is None:
+                cls.executor = ProcessPoolExecutor(
+                    max_workers=app_settings.PREVIEW_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return cls.executor
+
+    @classmethod
+    def shutdown(cls):
+        with cls.lock:
+            if cls.executor is not None:
+                cls.executor.shutdown(cancel_futures=True)
+                cls.executor = None
+
+
+def lookup_preview(session, row, width):
+    if width == app_settings.PREVIEW_DEFAULT_WIDTH:
+        return row.preview
+    stored = session.get(DevicePreview, (row.id, width))
+    return stored.blob if stored else None
+
+
+def store_previews(previews):
+    # Own session, so storing never disturbs a caller that is still iterating rows
+    session = SessionLocalDefault()
+    try:
+        for data_id, width, preview in previews:
+            if width == app_settings.PREVIEW_DEFAULT_WIDTH:
+                session.execute(
+                    update(DeviceData).where(DeviceData.id == data_id).values(preview=preview)
+                )
+            else:
+                session.merge(DevicePreview(device_data_id=data_id, width=width, blob=preview))
+        session.commit()
+    except exc.OperationalError as e:
+        # Previews are regenerated on the next miss
+        session.rollback()
+        print("Could not store previews:", e)
+    finally:
+        session.close()
+
+
+def get_preview(session, row, width, pending=None):
+    # Blocking, call it from a worker thread. Generated previews are stored
+    # right away, or appended to pending for the caller to store_previews() later.
+    preview = lookup_preview(session, row, width)
+    if preview is not None:
+        PreviewStats.count("hits")
+        return preview
+    source = frame_store.frame_source(row)
+    if not source:
+        return source
+    PreviewStats.count("misses")
+    try:
+        preview = PreviewPool.get().submit(make_preview, source, width).result()
+    except Exception:
+        PreviewStats.count("errors")
+        raise
+    if pending is None:
+        store_previews([(row.id, width, preview)])
+    else:
+        pending.append((row.id, width, preview))
+    return preview
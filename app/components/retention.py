@@ -0,0 +1,199 @@
+# SPDX-License-Identifier: Apache-2.0
+
+# Copyright (c) 2026 Pluraf Embedded AB <code@pluraf.com>
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import time
+import asyncio
+import threading
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, or_, text
+
+import app.settings as app_settings
+
+from app.components import frame_store
+from app.database_setup import SessionLocalDefault, default_engine
+from app.models.device import Device, DeviceData, DevicePreview
+from app.models.sensor import SensorReading
+
+
+class RetentionStats:
+    runs = 0
+    frames_deleted = 0
+    bytes_deleted = 0  # frame and preview payloads
+    bytes_vacuumed = 0  # released back to the file system
+    seconds_total = 0.0
+    seconds_last = 0.0
+    lock = threading.Lock()
+
+    @classmethod
+    def add(cls, frames, deleted, vacuumed, seconds):
+        with cls.lock:
+            cls.runs += 1
+            cls.frames_deleted += frames
+            cls.bytes_deleted += deleted
+            cls.bytes_vacuumed += vacuumed
+            cls.seconds_total += seconds
+            cls.seconds_last = seconds
+
+    @classmethod
+    def stats(cls):
+        with cls.lock:
+            return {
+                "runs": cls.runs,
+                "frames_deleted": cls.frames_deleted,
+                "bytes_deleted": cls.bytes_deleted,
+                "bytes_vacuumed": cls.bytes_vacuumed,
+                "seconds_total": round(cls.seconds_total, 3),
+                "seconds_last": round(cls.seconds_last, 3)
+            }
+
+
+def frame_size():
+    return (func.coalesce(func.length(DeviceData.blob), DeviceData.blob_size, 0)
+            + func.coalesce(func.length(DeviceData.preview), 0))
+
+
+def device_limits(session):
+    # Yields (device_id, max_age, max_frames, max_bytes) for every device with frames
+    devices = {device.id: device for device in session.query(Device)}
+    for (device_id,) in session.query(DeviceData.device_id).distinct().all():
+        device = devices.get(device_id)
+        limits = []
+        for name, default in (
+            ("retention_max_age", app_settings.RETENTION_MAX_AGE),
+            ("retention_max_frames", app_settings.RETENTION_MAX_FRAMES),
+            ("retention_max_bytes", app_settings.RETENTION_MAX_BYTES)
+        ):
+            value = getattr(device, name) if device is not None else None
+            limits.append(default if value is None else value)
+        yield device_id, *limits
+
+
+def expired_condition(session, device_id, max_age, max_frames, max_bytes):
+    # Frames of the device outside any of its limits, None when all are kept
+    conditions = []
+    if max_age:
+        conditions.append(DeviceData.created < datetime.utcnow() - timedelta(seconds=max_age))
+    if max_frames:
+        oldest_kept = (session.query(DeviceData.id)
+            .filter(DeviceData.device_id == device_id)
+            .order_by(DeviceData.id.desc())
+            .offset(max_frames - 1)
+            .limit(1)
+            .scalar()
+        )
+        if oldest_kept is not None:
+            conditions.append(DeviceData.id < oldest_kept)
+    if max_bytes:
+        # Newest frames are kept while their running total fits
+        totals = (session.query(
+                DeviceData.id.label("id"),
+                func.sum(frame_size()).over(order_by=DeviceData.id.desc()).label("total")
+            )
+            .filter(DeviceData.device_id == device_id)
+            .subquery()
+        )
+        first_over = (session.query(totals.c.id)
+            .filter(totals.c.total > max_bytes)
+            .order_by(totals.c.id.desc())
+            .limit(1)
+            .scalar()
+        )
+        if first_over is not None:
+            conditions.append(DeviceData.id <= first_over)
+    return or_(*conditions) if conditions else None
+
+
+def delete_frames(session, device_id, condition):
+    # Short transactions of RETENTION_BATCH_SIZE frames, so ingest is never blocked for long
+    batch_size = app_settings.RETENTION_BATCH_SIZE
+    frames = deleted = 0
+    while True:
+        rows = (session.query(DeviceData.id, frame_size(), DeviceData.blob_ref)
+            .filter(DeviceData.device_id == device_id, condition)
+            .order_by(DeviceData.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        ids = [row[0] for row in rows]
+        session.query(DevicePreview).filter(DevicePreview.device_data_id.in_(ids)).delete(
+            synchronize_session=False
+        )
+        session.query(SensorReading).filter(SensorReading.device_data_id.in_(ids)).delete(
+            synchronize_session=False
+        )
+        session.query(DeviceData).filter(DeviceData.id.in_(ids)).delete(synchronize_session=False)
+        session.commit()
+        frame_store.release_frames(session, [row[2] for row in rows])
+        frames += len(rows)
+        deleted += sum(row[1] for row in rows)
+        if len(rows) < batch_size:
+            break
+        time.sleep(app_settings.RETENTION_BATCH_PAUSE)
+    return frames, deleted
+
+
+def incremental_vacuum(engine):
+    # Returns the bytes given back to the file system. Only databases created with
+    # auto_vacuum=INCREMENTAL can shrink without a full VACUUM.
+    if engine.dialect.name != "sqlite":
+        return 0
+    with engine.connect() as connection:
+        if connection.execute(text("PRAGMA auto_vacuum")).scalar() != 2:
+            return 0
+        page_size = connection.execute(text("PRAGMA page_size")).scalar()
+        initial = free = connection.execute(text("PRAGMA freelist_count")).scalar()
+        while free:
+            pages = min(free, app_settings.RETENTION_VACUUM_PAGES)
+            connection.execute(text("PRAGMA incremental_vacuum({})".format(pages)))
+            connection.commit()
+            remaining = connection.execute(text("PRAGMA freelist_count")).scalar()
+            if remaining >= free:
+                break
+            free = remaining
+            time.sleep(app_settings.RETENTION_BATCH_PAUSE)
+        return (initial - free) * page_size
+
+
+def apply_retention():
+    started = time.monotonic()
+    frames = deleted = 0
+    session = SessionLocalDefault()
+    try:
+        for device_id, *limits in list(device_limits(session)):
+            condition = expired_condition(session, device_id, *limits)
+            if condition is not None:
+                device_frames, device_deleted = delete_frames(session, device_id, condition)
+                frames += device_frames
+                deleted += device_deleted
+        session.commit()
+    finally:
+        session.close()
+    vacuumed = incremental_vacuum(default_engine)
+    RetentionStats.add(frames, deleted, vacuumed, time.monotonic() - started)
+
+
+async def run(interval):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(apply_retention)
+        except Exception as e:
+            print("Retention failed:", e)
@@ -0,0 +1,214 @@
+# SPDX-License-Identifier: Apache-2.0
+
+# Copyright (c) 2026 Pluraf Embedded AB <code@pluraf.com>
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import json
+import asyncio
+import threading
+
+from datetime import timezone
+
+from sqlalchemy import Integer, cast, exc, func, insert, update
+
+import app.settings as app_settings
+
+from app.database_setup import SessionLocalDefault
+from app.models.device import DeviceData
+from app.models.sensor import SensorReading, SensorRollup, SensorExtractState
+
+
+def parse_sensor_data(sensor_data):
+    # Returns {} for missing or malformed sensor_data
+    try:
+        if type(sensor_data) is bytes:
+            sensor_data = sensor_data.decode()
+        sensor_data = json.loads(sensor_data) if sensor_data else {}
+    except ValueError:
+        return {}
+    return sensor_data if isinstance(sensor_data, dict) else {}
+
+
+def numeric_values(sensor_data, prefix=""):
+    # Nested objects are flattened into dotted metric names
+    for key, value in sensor_data.items():
+        if isinstance(value, dict):
+            yield from numeric_values(value, prefix + key + ".")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield prefix + key, float(value)
+
+
+def to_timestamp(created):
+    return created.replace(tzinfo=timezone.utc).timestamp()
+
+
+class ExtractStats:
+    frames = 0
+    readings = 0
+    last_device_data_id = 0
+    lock = threading.Lock()
+
+    @classmethod
+    def add(cls, frames, readings, last_device_data_id):
+        with cls.lock:
+            cls.frames += frames
+            cls.readings += readings
+            cls.last_device_data_id = last_device_data_id
+
+    @classmethod
+    def stats(cls):
+        with cls.lock:
+            return {
+                "frames": cls.frames,
+                "readings": cls.readings,
+                "last_device_data_id": cls.last_device_data_id
+            }
+
+
+def update_rollups(session, readings):
+    aggregates = {}
+    for reading in readings:
+        value = reading["value"]
+        for resolution in app_settings.SENSOR_ROLLUP_RESOLUTIONS.values():
+            bucket = int(reading["ts"] // resolution) * resolution
+            key = (resolution, reading["device_id"], reading["metric"], bucket)
+            aggregate = aggregates.get(key)
+            if aggregate is None:
+                aggregates[key] = [1, value, value, value]
+            else:
+                aggregate[0] += 1
+                aggregate[1] += value
+                aggregate[2] = min(aggregate[2], value)
+                aggregate[3] = max(aggregate[3], value)
+
+    for key, (count, total, minimum, maximum) in aggregates.items():
+        rollup = session.get(SensorRollup, key)
+        if rollup is None:
+            resolution, device_id, metric, bucket = key
+            session.add(SensorRollup(resolution=resolution, device_id=device_id, metric=metric,
+                bucket=bucket, count=count, sum=total, min=minimum, max=maximum))
+        else:
+            rollup.count += count
+            rollup.sum += total
+            rollup.min = min(rollup.min, minimum)
+            rollup.max = max(rollup.max, maximum)
+
+
+def extract_batch(batch_size):
+    # Moves the numeric values of the next frames into sensor_readings and the
+    # rollups, in one transaction with the watermark. Returns the number of frames.
+    session = SessionLocalDefault()
+    try:
+        state = session.get(SensorExtractState, 1)
+        if state is None:
+            session.add(SensorExtractState(id=1, last_device_data_id=0))
+            try:
+                session.commit()
+            except exc.IntegrityError:
+                session.rollback()
+            state = session.get(SensorExtractState, 1)
+        last_device_data_id = state.last_device_data_id
+        rows = (
+            session.query(
+                DeviceData.id, DeviceData.device_id, DeviceData.created, DeviceData.sensor_data
+            )
+            .filter(DeviceData.id > last_device_data_id)
+            .order_by(DeviceData.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            return 0
+        readings = []
+        for device_data_id, device_id, created, sensor_data in rows:
+            if created is None:
+                continue
+            ts = to_timestamp(created)
+            for metric, value in numeric_values(parse_sensor_data(sensor_data)):
+                readings.append({
+                    "device_data_id": device_data_id,
+                    "device_id": device_id,
+                    "metric": metric,
+                    "ts": ts,
+                    "value": value
+                })
+        if readings:
+            session.execute(insert(SensorReading), readings)
+            update_rollups(session, readings)
+        # Another worker process may have taken the same batch
+        moved = session.execute(
+            update(SensorExtractState)
+            .where(
+                SensorExtractState.id == 1,
+                SensorExtractState.last_device_data_id == last_device_data_id,
+            )
+            .values(last_device_data_id=rows[-1].id)
+        ).rowcount
+        if not moved:
+            session.rollback()
+            return 0
+        session.commit()
+        ExtractStats.add(len(rows), len(readings), rows[-1].id)
+        return len(rows)
+    finally:
+        session.close()
+
+
+def extract_pending():
+    batch_size = app_settings.SENSOR_EXTRACT_BATCH_SIZE
+    while extract_batch(batch_size) == batch_size:
+        pass
+
+
+async def run(interval):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(extract_pending)
+        except Exception as e:
+            print("Sensor extraction failed:", e)
+
+
+def aggregate(session, device_id, metric, bucket, since=None, until=None):
+    # Returns rows of (bucket start, count, min, max, avg), oldest first. Buckets
+    # matching a rollup resolution are read pre-aggregated, others are
+    # computed from the raw readings.
+    if bucket in app_settings.SENSOR_ROLLUP_RESOLUTIONS.values():
+        query = (session.query(
+                SensorRollup.bucket, SensorRollup.count, SensorRollup.min, SensorRollup.max,
+                SensorRollup.sum / SensorRollup.count
+            )
+            .filter(SensorRollup.resolution == bucket, SensorRollup.device_id == device_id,
+                    SensorRollup.metric == metric)
+        )
+        if since is not None:
+            query = query.filter(SensorRollup.bucket >= int(since // bucket) * bucket)
+        if until is not None:
+            query = query.filter(SensorRollup.bucket < until)
+        return query.order_by(SensorRollup.bucket).all()
+
+    bucket_start = cast(SensorReading.ts / bucket, Integer) * bucket
+    query = session.query(
+        bucket_start,
+        func.count(),
+        func.min(SensorReading.value),
+        func.max(SensorReading.value),
+        func.avg(SensorReading.value),
+    ).filter(SensorReading.device_id == device_id, SensorReading.metric == metric)
+    if since is not None:
+        query = query.filter(SensorReading.ts >= since)
+    if until is not None:
+        query = query.filter(SensorReading.ts < until)
+    return query.group_by(bucket_start).order_by(bucket_start).all()
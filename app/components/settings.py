@@ -18,21 +18,48 @@
 import cbor2
 import zmq
 import json
+import time
+import threading
 
 import app.settings as app_settings
 
-from sqlalchemy import exc
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import exc, func
 
 from app.models.settings import SettingsModel
-from app.database_setup import default_engine
-from app.utils import get_mode, GNodeMode, send_zmq_request, get_zmq_socket
+from app.database_setup import SessionLocalDefault
+from app.utils import get_mode, GNodeMode, send_zmq_request
+from app.zmq_client import zmq_request
 
 class Settings:
+    # Process-wide snapshot of the settings row. Other workers' changes are
+    # picked up by comparing the version column at most every SETTINGS_CACHE_TTL.
+    _snapshot = None
+    _checked = 0
+    _lock = threading.Lock()
+
     def __init__(self):
-        session = sessionmaker(bind=default_engine)()
-        self._settings = session.query(SettingsModel).first()
-        session.close()
+        self._settings = self._load_snapshot()
+
+    @classmethod
+    def _load_snapshot(cls):
+        with cls._lock:
+            now = time.monotonic()
+            if cls._snapshot is not None and now - cls._checked < app_settings.SETTINGS_CACHE_TTL:
+                return cls._snapshot
+            with SessionLocalDefault() as session:
+                if cls._snapshot is not None:
+                    version = session.query(SettingsModel.version).scalar()
+                    if version == cls._snapshot.version:
+                        cls._checked = now
+                        return cls._snapshot
+                cls._snapshot = session.query(SettingsModel).first()
+                cls._checked = now
+            return cls._snapshot
+
+    @classmethod
+    def invalidate(cls):
+        with cls._lock:
+            cls._snapshot = None
 
     @property
     def api_authentication(self):
@@ -40,12 +67,13 @@ class Settings:
 
     @api_authentication.setter
     def api_authentication(self, value):
-        session = sessionmaker(bind=default_engine)()
+        session = SessionLocalDefault()
         try:
             if not send_zmq_set_auth_req(self._settings.api_authentication,value):
                 raise RuntimeError("Cannot set api_authentication for m-broker-c and m2e-bridge")
-            self._settings.api_authentication = value
-            session.add(self._settings)
+            settings = session.query(SettingsModel).first()
+            settings.api_authentication = value
+            settings.version = func.coalesce(SettingsModel.version, 0) + 1
             session.commit()
             self._settings = session.query(SettingsModel).first()
         except exc.SQLAlchemyError:
@@ -53,15 +81,17 @@ class Settings:
             raise
         finally:
             session.close()
+        with self._lock:
+            Settings._snapshot = self._settings
+            Settings._checked = time.monotonic()
 
-    @property
-    def gcloud(self):
+    async def get_gcloud(self):
         rep = {
             "https": None,
             "ssh": None
         }
         try:
-            info_str = send_zmq_request(app_settings.ZMQ_GCLIENT_SOCKET, "info")
+            info_str = await zmq_request(app_settings.ZMQ_GCLIENT_SOCKET, "info")
             info = json.loads(info_str)
         except zmq.error.ZMQError:
             return rep
@@ -73,45 +103,38 @@ class Settings:
                 rep["ssh"] = mapping[0]
         return rep
 
-    @gcloud.setter
-    def gcloud(self, value):
-        try:
-            socket = get_zmq_socket(app_settings.ZMQ_GCLIENT_SOCKET, 4000)
-            if socket is None:
-                raise RuntimeError("Can not connect to gclient socket")
-            commands = []
-
-            https = value.get("https")
-            if https is not None:
-                commands.append("https_on" if https else "https_off")
-
-            ssh = value.get("ssh")
-            if ssh is not None:
-                commands.append("ssh_on" if ssh else "ssh_off")
-
-            for command in commands:
-                socket.send_string(command)
-                if socket.recv_string() != "OK":
-                    raise RuntimeError("Can not execute command %s" % command)
-        finally:
-            if socket is not None:
-                socket.close()
+    async def set_gcloud(self, value):
+        commands = []
+
+        https = value.get("https")
+        if https is not None:
+            commands.append("https_on" if https else "https_off")
+
+        ssh = value.get("ssh")
+        if ssh is not None:
+            commands.append("ssh_on" if ssh else "ssh_off")
+
+        for command in commands:
+            if await zmq_request(app_settings.ZMQ_GCLIENT_SOCKET, command, 4000) != b"OK":
+                raise RuntimeError("Can not execute command %s" % command)
 
 
 def init_settings_table():
-    session = sessionmaker(bind=default_engine)()
-    settings = session.query(SettingsModel).first()
-    if settings is None:
-        session.add(SettingsModel())
-        session.commit()
+    with SessionLocalDefault() as session:
         settings = session.query(SettingsModel).first()
-        session.close()
+        created = settings is None
+        if created:
+            session.add(SettingsModel())
+            session.commit()
+            settings = session.query(SettingsModel).first()
+    if created:
         #no need to reset api_auth value in case of failure since it is initialization
         send_zmq_set_auth_req(settings.api_authentication, settings.api_authentication)
     else:
         # if api_authentication is set to false, ensure status is reflected in m2e bridge and m-brocker-c
         if not settings.api_authentication:
             send_zmq_set_auth_req(False, False)
+    Settings.invalidate()
 
 
 def send_zmq_set_auth_req(old_api_auth, new_api_auth):
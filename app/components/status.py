@@ -15,9 +15,17 @@
 # limitations under the License.
 
 
-from app.utils import run_command, get_mode, GNodeMode
+import time
+import asyncio
+import threading
 import subprocess
 
+import app.settings as app_settings
+
+from app.utils import run_command, get_mode, GNodeMode
+from app.components.dbus import DbusError, SystemdClient, get_system_bus, use_system_bus
+
+
 class ServiceStatus:
     MALFORMED = "malformed"
     STOPPED = "stopped"
@@ -25,49 +33,188 @@ class ServiceStatus:
     FAILED = "failed"
 
 
-# Function to return status as "running", "not running" or "failed"
-def get_systemd_service_status(service_name):
-    #command: systemctl show <service_name> --property=ActiveState,SubState
-    command = ['systemctl', 'show', service_name, '--property=ActiveState,SubState,LoadState']
-    service_status = {}
+def parse_systemd_service_status(service_status):
+    if service_status["LoadState"] in ["not-found", "masked"]:
+        return ServiceStatus.MALFORMED
+    if service_status["LoadState"] == "loaded":
+        if service_status["ActiveState"] == "active":
+            if service_status["SubState"] == "running":
+                return ServiceStatus.RUNNING
+            else:
+                return ServiceStatus.STOPPED
+        if service_status["ActiveState"] == "failed":
+            return ServiceStatus.FAILED
+        else:
+            return ServiceStatus.STOPPED
+    else:
+        return ServiceStatus.FAILED
+
+
+def get_systemd_services_status(service_names):
+    # command: systemctl show <service_name>... --property=ActiveState,SubState,LoadState
+    # Units are printed in the given order, separated by an empty line
+    command = (
+        ["systemctl", "show"] + list(service_names) + ["--property=ActiveState,SubState,LoadState"]
+    )
+    statuses = dict.fromkeys(service_names, ServiceStatus.MALFORMED)
     try:
         resp = run_command(command)
-        for line in resp.splitlines():
+    except (subprocess.CalledProcessError, OSError):
+        return statuses
+    for service_name, block in zip(service_names, resp.split("\n\n")):
+        service_status = {}
+        for line in block.splitlines():
             [attr, val] = line.split("=", 1)
             service_status[attr] = val
-        if service_status["LoadState"] in ["not-found", "masked"]:
-            return ServiceStatus.MALFORMED
-        if service_status["LoadState"] == "loaded":
-            if service_status["ActiveState"] == "active":
-                if service_status["SubState"] == "running":
-                    return ServiceStatus.RUNNING
-                else:
-                    return ServiceStatus.STOPPED
-            if service_status["ActiveState"] == "failed":
-                return ServiceStatus.FAILED
-            else:
-                return ServiceStatus.STOPPED
-        else:
-            return ServiceStatus.FAILED
-    except subprocess.CalledProcessError:
-        return ServiceStatus.MALFORMED
+        try:
+            statuses[service_name] = parse_systemd_service_status(service_status)
+        except KeyError:
+            pass
+    return statuses
 
 
-def get_supervisor_service_status(service_name):
+# Function to return status as "running", "not running" or "failed"
+def get_systemd_service_status(service_name):
+    return get_systemd_services_status([service_name])[service_name]
+
+
+def get_supervisor_services_status(service_names):
+    statuses = dict.fromkeys(service_names, ServiceStatus.MALFORMED)
     try:
-        resp = run_command(['supervisorctl', 'status', service_name])
-        status = resp.split()[1]
+        resp = run_command(['supervisorctl', 'status'] + list(service_names))
+    except subprocess.CalledProcessError as e:
+        # supervisorctl exits non-zero as soon as one of the programs is not running
+        resp = e.stdout or ""
+    except OSError:
+        return statuses
+    for line in resp.splitlines():
+        try:
+            service_name, status = line.split()[:2]
+        except ValueError:
+            continue
+        if service_name not in statuses:
+            continue
         if status == "RUNNING":
-            return ServiceStatus.RUNNING
-        if status == "STOPPED":
-            return ServiceStatus.STOPPED
-        return ServiceStatus.MALFORMED
-    except subprocess.CalledProcessError:
-        return ServiceStatus.MALFORMED
+            statuses[service_name] = ServiceStatus.RUNNING
+        elif status == "STOPPED":
+            statuses[service_name] = ServiceStatus.STOPPED
+    return statuses
+
+
+def get_supervisor_service_status(service_name):
+    return get_supervisor_services_status([service_name])[service_name]
+
+
+def get_services_status(service_names):
+    if get_mode() == GNodeMode.PHYSICAL:
+        return get_systemd_services_status(service_names)
+    else:
+        return get_supervisor_services_status(service_names)
 
 
 def get_service_status(service_name):
     if get_mode() == GNodeMode.PHYSICAL:
         return get_systemd_service_status(service_name)
     else:
-        return get_supervisor_service_status(service_name)
\ No newline at end of file
+        return get_supervisor_service_status(service_name)
+
+
+class SubprocessStatusBackend:
+    def services_status(self, service_names):
+        return get_services_status(service_names)
+
+
+class DbusStatusBackend:
+    def __init__(self, systemd):
+        self.systemd = systemd
+        # GNODE_SYSTEM_BACKEND=dbus reports bus failures instead of falling back
+        self.fallback = (
+            SubprocessStatusBackend() if app_settings.SYSTEM_BACKEND != "dbus" else None
+        )
+
+    def services_status(self, service_names):
+        try:
+            units = self.systemd.units_properties(service_names)
+        except DbusError:
+            if self.fallback is None:
+                raise
+            return self.fallback.services_status(service_names)
+        statuses = {}
+        for service_name, properties in units.items():
+            try:
+                statuses[service_name] = parse_systemd_service_status(properties)
+            except KeyError:
+                statuses[service_name] = ServiceStatus.MALFORMED
+        return statuses
+
+
+class BackendCache:
+    backend = None
+
+
+def get_status_backend():
+    if BackendCache.backend is None:
+        bus = get_system_bus() if use_system_bus() else None
+        if bus is not None:
+            BackendCache.backend = DbusStatusBackend(SystemdClient(bus))
+        else:
+            BackendCache.backend = SubprocessStatusBackend()
+    return BackendCache.backend
+
+
+class ServiceStatusRegistry:
+    # Keeps the last known status of every registered service, refreshed for
+    # all of them with a single command. Readers only hit the system when an
+    # entry is missing or older than max_age.
+
+    def __init__(self, service_names, max_age):
+        self.max_age = max_age
+        self._service_names = set(service_names)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def refresh(self, service_names=None):
+        with self._lock:
+            if service_names is None:
+                service_names = self._service_names
+            else:
+                self._service_names.update(service_names)
+            service_names = sorted(service_names)
+        statuses = get_status_backend().services_status(service_names)
+        updated = time.monotonic()
+        with self._lock:
+            for service_name, status in statuses.items():
+                self._entries[service_name] = (status, updated)
+        return statuses
+
+    def get(self, service_name, max_age=None):
+        # Returns (status, age in seconds)
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            entry = self._entries.get(service_name)
+        if entry is None or time.monotonic() - entry[1] > max_age:
+            self.refresh([service_name])
+            with self._lock:
+                entry = self._entries[service_name]
+        return entry[0], time.monotonic() - entry[1]
+
+    def status(self, service_name, max_age=None):
+        return self.get(service_name, max_age)[0]
+
+    async def run(self, interval):
+        while True:
+            await asyncio.to_thread(self.refresh)
+            await asyncio.sleep(interval)
+
+
+service_registry = ServiceStatusRegistry(
+    [
+        app_settings.MQBC_SERVICE_NAME,
+        app_settings.M2EB_SERVICE_NAME,
+        app_settings.GCLOUD_SERVICE_NAME,
+        "chirpstack-gateway-bridge-ws",
+        "chirpstack-gateway-bridge-wss",
+        "hostapd@SoftAp0"
+    ],
+    app_settings.SERVICE_STATUS_MAX_AGE
+)
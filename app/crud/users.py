@@ -17,11 +17,14 @@
 
 import os
 
-from sqlalchemy.orm import Session
-from passlib.hash import bcrypt
+from sqlalchemy import exc, event, inspect
+from sqlalchemy.orm import Session, object_session
 
 from app.models.user import UserModel
+import app.settings as settings
 import app.schemas.user as user_schema
+from app.cache import TTLCache
+from app.passwords import hash_password
 
 
 def get_user(db_session: Session, user_id: int):
@@ -32,6 +35,41 @@ def get_user_by_username(db_session: Session, username: str):
     return db_session.query(UserModel).filter(UserModel.username == username).first()
 
 
+# Maps username to its validated user_schema.User, invalidated by the mapper events below
+principal_cache = TTLCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL)
+
+
+@event.listens_for(UserModel, "after_insert")
+@event.listens_for(UserModel, "after_update")
+@event.listens_for(UserModel, "after_delete")
+def invalidate_principal(mapper, connection, target):
+    usernames = {target.username, *inspect(target).attrs.username.history.deleted}
+    for username in usernames:
+        principal_cache.pop(username)
+    # Evict again after commit, a concurrent lookup may have cached the old row meanwhile
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("evicted_principals", set()).update(usernames)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def evict_principals(session):
+    for username in session.info.pop("evicted_principals", ()):
+        principal_cache.pop(username)
+
+
+def get_principal(db_session: Session, username: str):
+    user = principal_cache.get(username)
+    if user is None:
+        db_user = get_user_by_username(db_session, username)
+        if db_user is None:
+            return None
+        user = user_schema.User.model_validate(db_user)
+        principal_cache.set(username, user)
+    return user
+
+
 def get_users(db_session: Session, skip: int = 0, limit: int = 100):
     return db_session.query(UserModel).offset(skip).limit(limit).all()
 
@@ -42,7 +80,7 @@ def create_user(db_session: Session, user: user_schema.UserCreate):
     if existing_user:
         raise ValueError("Username already exist")
 
-    hashed_password = bcrypt.hash(user.password)
+    hashed_password = hash_password(user.password)
     db_user = UserModel(
         username=user.username, hashed_password=hashed_password, is_admin=user.is_admin
     )
@@ -52,6 +90,15 @@ def create_user(db_session: Session, user: user_schema.UserCreate):
     return db_user
 
 
+def update_hashed_password(db_session: Session, db_user: UserModel, hashed_password: str):
+    db_user.hashed_password = hashed_password
+    try:
+        db_session.commit()
+    except exc.SQLAlchemyError:
+        # The old hash keeps working, the update is retried on the next login
+        db_session.rollback()
+
+
 def delete_user(db_session: Session, user_id: int):
     user = get_user(db_session, user_id)
     if user is None:
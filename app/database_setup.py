@@ -31,20 +31,56 @@
 
 import os
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import declarative_base, sessionmaker
 
+import app.settings as app_settings
+
 GNODE_DATABASE_URL = os.getenv("GNODE_DATABASE_URL")
 AUTHBUNDLE_DATABASE_URL = os.getenv("AUTHBUNDLE_DATABASE_URL")
 
-if GNODE_DATABASE_URL.startswith("sqlite"):
-    default_engine = create_engine(GNODE_DATABASE_URL, connect_args={"check_same_thread": False})
-else:
-    default_engine = create_engine(GNODE_DATABASE_URL)
 
-auth_engine = create_engine(AUTHBUNDLE_DATABASE_URL, connect_args={"check_same_thread": False})
+def make_engine(url):
+    options = {
+        "pool_size": app_settings.DB_POOL_SIZE,
+        "max_overflow": app_settings.DB_POOL_MAX_OVERFLOW,
+        "pool_timeout": app_settings.DB_POOL_TIMEOUT,
+        "pool_pre_ping": True,
+    }
+    if url.startswith("sqlite"):
+        options["connect_args"] = {"check_same_thread": False}
+    engine = create_engine(url, **options)
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", set_sqlite_pragmas)
+    return engine
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    # Must come first: switching to WAL writes the header of a new database
+    # file, which fixes its auto_vacuum mode. Existing files are converted by
+    # migrations.enable_incremental_vacuum().
+    dbapi_connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    # WAL lets readers proceed while a writer commits, busy_timeout makes
+    # concurrent writers wait for the lock instead of failing at once
+    dbapi_connection.execute("PRAGMA journal_mode = WAL")
+    dbapi_connection.execute("PRAGMA busy_timeout = {:d}".format(app_settings.DB_BUSY_TIMEOUT))
+
+
+def pool_stats(engine):
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+
+
+default_engine = make_engine(GNODE_DATABASE_URL)
+auth_engine = make_engine(AUTHBUNDLE_DATABASE_URL)
 
 SessionLocalDefault = sessionmaker(autocommit=False, autoflush=False, bind=default_engine)
+SessionLocalAuth = sessionmaker(autocommit=False, autoflush=False, bind=auth_engine)
 
 DefaultBase = declarative_base()
 AuthBase = declarative_base()
@@ -15,7 +15,7 @@
 # limitations under the License.
 
 
-from app.database_setup import SessionLocalDefault
+from app.database_setup import SessionLocalDefault, SessionLocalAuth
 
 
 def get_db():
@@ -24,3 +24,11 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_auth_db():
+    db = SessionLocalAuth()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,122 @@
+# SPDX-License-Identifier: Apache-2.0
+
+# Copyright (c) 2026 Pluraf Embedded AB <code@pluraf.com>
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import json
+import base64
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import func, tuple_
+
+import app.settings as app_settings
+
+
+class ListParams:
+    # Common query parameters of list endpoints, used as a dependency
+    def __init__(
+        self,
+        limit: int | None = Query(None, ge=1, le=app_settings.LIST_MAX_LIMIT),
+        cursor: str | None = None,
+        sort: str | None = None,
+        count: bool = False,
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.sort = sort
+        self.count = count
+
+
+def unprocessable(detail):
+    return HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=detail)
+
+
+def encode_cursor(sort, values):
+    return base64.urlsafe_b64encode(json.dumps([sort, *values]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, sort):
+    try:
+        cursor_sort, *values = json.loads(
+            base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        )
+    except (ValueError, TypeError):
+        raise unprocessable("Invalid cursor")
+    if cursor_sort != sort or len(values) != 2:
+        raise unprocessable("Cursor does not match the requested sort")
+    return values
+
+
+def prefix_filter(query, column, prefix):
+    if prefix:
+        query = query.filter(column.startswith(prefix, autoescape=True))
+    return query
+
+
+def equal_filter(query, column, value):
+    if value is not None:
+        query = query.filter(column == value)
+    return query
+
+
+def paginate(query, params, response, key, sortable):
+    # Keyset pagination over (sort column, key). sort is a name from sortable,
+    # "-" prefixed for descending order. The continuation cursor goes into the
+    # X-Next-Cursor header and, on request, the number of matches into X-Total-Count.
+    # Without limit and cursor all matching rows are returned, as before pagination.
+    sort = params.sort or key.name
+    name = sort[1:] if sort.startswith("-") else sort
+    if name not in sortable:
+        raise unprocessable(
+            "sort must be one of {}, optionally prefixed with -".format(list(sortable))
+        )
+    column = sortable[name]
+    null_value = None
+    if column is not key:
+        # NULLs can not be compared in the keyset condition
+        null_value = "" if column.type.python_type is str else 0
+        column = func.coalesce(column, null_value)
+    descending = sort.startswith("-")
+
+    if params.count:
+        response.headers["X-Total-Count"] = str(query.order_by(None).count())
+
+    if params.cursor is not None:
+        values = decode_cursor(params.cursor, sort)
+        if column is key:
+            query = query.filter(key < values[1] if descending else key > values[1])
+        else:
+            keyset = tuple_(column, key)
+            query = query.filter(
+                keyset < tuple_(*values) if descending else keyset > tuple_(*values)
+            )
+
+    order = [column.desc(), key.desc()] if descending else [column, key]
+    if column is key:
+        order = order[:1]
+    query = query.order_by(*order)
+    if params.limit is None and params.cursor is None:
+        return query.all()
+    limit = params.limit or app_settings.LIST_DEFAULT_LIMIT
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        sort_value = getattr(last, sortable[name].key)
+        if sort_value is None:
+            sort_value = null_value
+        key_value = getattr(last, key.key)
+        response.headers["X-Next-Cursor"] = encode_cursor(sort, [sort_value, key_value])
+    return rows
@@ -16,6 +16,7 @@
 
 
 import json
+import asyncio
 
 from contextlib import asynccontextmanager
 
@@ -32,7 +33,17 @@ from app.routers.api import router as api_router
 from app.crud.users import load_first_user
 from app.database_setup import SessionLocalDefault, DefaultBase, AuthBase, default_engine, auth_engine
 from app.components.settings import init_settings_table
+from app.components.status import service_registry
+from app.migrations import run_migrations
 from app.zmq_setup import zmq_context
+from app.zmq_client import close_zmq_clients
+from app.components.preview import PreviewPool
+from app.passwords import PasswordPool, PasswordPolicy
+from app.components import sensor_store, retention, frame_store
+from app.components.frame_feed import frame_feed
+from app.components.dbus import get_system_bus
+
+import app.settings as app_settings
 
 # We load all DB models here, so Base classes can create all tables in lifespan
 import app.models.authbundle
@@ -42,23 +53,51 @@ import app.models.meta_data
 import app.models.converter
 import app.models.api_token
 import app.models.device
+import app.models.sensor
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    db_session = SessionLocalDefault()
+    if app_settings.SYSTEM_BACKEND == "dbus":
+        # Fail at startup rather than on the first status or network request
+        get_system_bus()
     DefaultBase.metadata.create_all(bind=default_engine)
     AuthBase.metadata.create_all(bind=auth_engine)
+    run_migrations()
     try:
         # Load first user to DB
-        load_first_user(db_session)
-        db_session.close()
+        PasswordPolicy.configure()
+        with SessionLocalDefault() as db_session:
+            load_first_user(db_session)
         # Initialize settings table
         init_settings_table()
+        status_refresher = asyncio.create_task(
+            service_registry.run(app_settings.SERVICE_STATUS_REFRESH_INTERVAL)
+        )
+        sensor_extractor = asyncio.create_task(
+            sensor_store.run(app_settings.SENSOR_EXTRACT_INTERVAL)
+        )
+        retention_task = asyncio.create_task(
+            retention.run(app_settings.RETENTION_INTERVAL)
+        )
+        frame_offloader = None
+        if app_settings.FRAME_OFFLOAD:
+            frame_offloader = asyncio.create_task(
+                frame_store.run(app_settings.FRAME_OFFLOAD_INTERVAL)
+            )
         yield
+        status_refresher.cancel()
+        sensor_extractor.cancel()
+        retention_task.cancel()
+        if frame_offloader is not None:
+            frame_offloader.cancel()
+        frame_feed.stop()
     finally:
         # Clean up
+        close_zmq_clients()
         zmq_context.term()
+        PreviewPool.shutdown()
+        PasswordPool.shutdown()
 
 
 def get_application() -> FastAPI:
@@ -0,0 +1,109 @@
+# SPDX-License-Identifier: Apache-2.0
+
+# Copyright (c) 2026 Pluraf Embedded AB <code@pluraf.com>
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# create_all() only creates missing tables, so schema additions to existing
+# tables are applied here. Every step must be idempotent.
+
+from sqlalchemy import inspect, text
+
+import app.settings as app_settings
+
+from app.database_setup import DefaultBase, AuthBase, default_engine, auth_engine
+from app.models.api_token import hash_token
+
+
+def add_missing_columns(engine, base):
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = "ALTER TABLE {} ADD COLUMN {} {}".format(
+                    table.name, column.name, column.type.compile(dialect=engine.dialect)
+                )
+                if column.default is not None and column.default.is_scalar:
+                    ddl += " DEFAULT {}".format(int(column.default.arg)
+                        if isinstance(column.default.arg, bool) else repr(column.default.arg))
+                connection.execute(text(ddl))
+
+
+def add_missing_indexes(engine, base):
+    inspector = inspect(engine)
+    created = False
+    with engine.begin() as connection:
+        for table in base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(connection)
+                    created = True
+        if created and engine.dialect.name == "sqlite":
+            # Refresh planner statistics, so the new indexes are picked up
+            connection.execute(text("ANALYZE"))
+
+
+def hash_api_tokens(engine):
+    # API tokens used to be stored in plain text in the token column
+    inspector = inspect(engine)
+    if not inspector.has_table("api_tokens"):
+        return
+    if "token" not in {column["name"] for column in inspector.get_columns("api_tokens")}:
+        return
+    with engine.begin() as connection:
+        rows = connection.execute(
+            text("SELECT id, token FROM api_tokens WHERE token IS NOT NULL")
+        ).all()
+        if rows:
+            connection.execute(
+                text(
+                    "UPDATE api_tokens SET token_hash = :token_hash, "
+                    "token_prefix = :token_prefix, token = NULL WHERE id = :id"
+                ),
+                [
+                    {
+                        "id": row_id,
+                        "token_hash": hash_token(token),
+                        "token_prefix": token[: app_settings.API_TOKEN_PREFIX_LENGTH],
+                    }
+                    for row_id, token in rows
+                ],
+            )
+
+
+def enable_incremental_vacuum(engine):
+    # auto_vacuum of an existing database only changes with a full VACUUM
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        if connection.execute(text("PRAGMA auto_vacuum")).scalar() != 2:
+            connection.execute(text("PRAGMA auto_vacuum = INCREMENTAL"))
+            connection.execute(text("VACUUM"))
+
+
+def run_migrations():
+    enable_incremental_vacuum(default_engine)
+    add_missing_columns(default_engine, DefaultBase)
+    add_missing_columns(auth_engine, AuthBase)
+    hash_api_tokens(default_engine)
+    add_missing_indexes(default_engine, DefaultBase)
+    add_missing_indexes(auth_engine, AuthBase)
@@ -17,9 +17,10 @@
 
 import time
 import enum
+import hashlib
 
 from app.database_setup import DefaultBase
-from sqlalchemy import Column, String, Integer
+from sqlalchemy import Column, String, Integer, Index
 
 
 class ApitokenState(int, enum.Enum):
@@ -31,12 +32,22 @@ class ApitokenState(int, enum.Enum):
 class ApiToken(DefaultBase):
     __tablename__ = 'api_tokens'
     id = Column(Integer, primary_key=True, autoincrement=True)
-    token = Column(String)
+    # Only the sha256 of the secret is stored, the secret is shown once on creation
+    token_hash = Column(String)
+    token_prefix = Column(String)  # lets users tell tokens apart
     state = Column(Integer)
     created = Column(Integer)  # Unix timestamp
     till = Column(Integer)  # Unix timestamp
     description = Column(String)
 
+    __table_args__ = (
+        Index("ix_api_tokens_token_hash", "token_hash", unique=True),
+    )
+
     @property
     def expired(self):
         return self.till != 0 and self.till < time.time()
+
+
+def hash_token(token):
+    return hashlib.sha256(token.encode()).hexdigest()
@@ -30,7 +30,8 @@
 
 
 from app.database_setup import DefaultBase
-from sqlalchemy import Column, String, Integer, LargeBinary, DateTime, Boolean
+from sqlalchemy import Column, String, Integer, LargeBinary, DateTime, Boolean, Index
+from sqlalchemy.orm import deferred
 
 
 class Device(DefaultBase):
@@ -39,6 +40,10 @@ class Device(DefaultBase):
     type = Column(String)
     enabled = Column(Boolean)
     description = Column(String)
+    # Retention limits, NULL uses the settings.RETENTION_* default and 0 disables the limit
+    retention_max_age = Column(Integer)  # seconds
+    retention_max_frames = Column(Integer)
+    retention_max_bytes = Column(Integer)
 
 
 class DeviceData(DefaultBase):
@@ -46,6 +51,25 @@ class DeviceData(DefaultBase):
     id = Column(Integer, primary_key=True)
     device_id = Column(String)
     created = Column(DateTime)
-    blob = Column(LargeBinary)
-    preview = Column(LargeBinary)
+    # Images are only loaded when a query asks for them
+    blob = deferred(Column(LargeBinary))
+    blob_ref = Column(String)  # sha256 of a frame offloaded to settings.FRAME_STORAGE_DIR
+    blob_size = Column(Integer)  # size of the offloaded frame
+    preview = deferred(Column(LargeBinary))
     sensor_data = Column(String)
+
+    # Latest frame and history lookups are per device, ordered by id or created
+    __table_args__ = (
+        Index("ix_device_data_device_id_id", "device_id", "id"),
+        Index("ix_device_data_device_id_created", "device_id", "created"),
+        Index("ix_device_data_blob_ref", "blob_ref"),
+    )
+
+
+class DevicePreview(DefaultBase):
+    # Previews in widths other than settings.PREVIEW_DEFAULT_WIDTH,
+    # which lives in DeviceData.preview
+    __tablename__ = 'device_previews'
+    device_data_id = Column(Integer, primary_key=True)
+    width = Column(Integer, primary_key=True)
+    blob = Column(LargeBinary)
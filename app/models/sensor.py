@@ -0,0 +1,54 @@
+# SPDX-License-Identifier: Apache-2.0
+
+# Copyright (c) 2026 Pluraf Embedded AB <code@pluraf.com>
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+from app.database_setup import DefaultBase
+from sqlalchemy import Column, String, Integer, Float, Index
+
+
+class SensorReading(DefaultBase):
+    # Numeric sensor_data values of device_data frames, one row per metric
+    __tablename__ = 'sensor_readings'
+    id = Column(Integer, primary_key=True)
+    device_data_id = Column(Integer, index=True)
+    device_id = Column(String)
+    metric = Column(String)
+    ts = Column(Float)  # UNIX seconds
+    value = Column(Float)
+
+    __table_args__ = (
+        Index("ix_sensor_readings_device_id_metric_ts", "device_id", "metric", "ts"),
+    )
+
+
+class SensorRollup(DefaultBase):
+    # Aggregates of sensor_readings per bucket of `resolution` seconds
+    __tablename__ = 'sensor_rollups'
+    resolution = Column(Integer, primary_key=True)
+    device_id = Column(String, primary_key=True)
+    metric = Column(String, primary_key=True)
+    bucket = Column(Integer, primary_key=True)  # UNIX seconds of the bucket start
+    count = Column(Integer)
+    sum = Column(Float)
+    min = Column(Float)
+    max = Column(Float)
+
+
+class SensorExtractState(DefaultBase):
+    __tablename__ = 'sensor_extract_state'
+    id = Column(Integer, primary_key=True)
+    last_device_data_id = Column(Integer)
@@ -24,3 +24,6 @@ class SettingsModel(DefaultBase):
     __tablename__ = "settings"
     id = Column(Integer, primary_key=True)
     api_authentication = Column(Boolean, default=True)
+    version = Column(
+        Integer, default=0
+    )  # Bumped on every change, lets workers detect stale snapshots
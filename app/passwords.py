@@ -0,0 +1,171 @@
+# SPDX-License-Identifier: Apache-2.0
+
+# Copyright (c) 2026 Pluraf Embedded AB <code@pluraf.com>
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import math
+import time
+import asyncio
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+import app.settings as app_settings
+
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+class PasswordPoolBusy(Exception):
+    pass
+
+
+def measure_rounds(rounds, repeat=3):
+    handler = pwd_context.handler("bcrypt").using(rounds=rounds)
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        handler.hash("calibration")
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def calibrate_rounds(target):
+    # Every bcrypt round doubles the cost, so one measurement at the lowest
+    # allowed cost is enough to pick the highest one within the target
+    elapsed = measure_rounds(app_settings.PASSWORD_MIN_ROUNDS)
+    rounds = app_settings.PASSWORD_MIN_ROUNDS
+    if elapsed > 0:
+        rounds += max(0, math.floor(math.log2(target / elapsed)))
+    return min(rounds, app_settings.PASSWORD_MAX_ROUNDS)
+
+
+class PasswordPolicy:
+    # Hashes with any other cost are flagged by pwd_context.needs_update()
+    # and replaced on the next successful login
+    rounds = None
+    lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, recalibrate=False):
+        with cls.lock:
+            if cls.rounds is None or recalibrate:
+                rounds = app_settings.PASSWORD_ROUNDS or calibrate_rounds(
+                    app_settings.PASSWORD_HASH_TARGET
+                )
+                pwd_context.update(
+                    bcrypt__default_rounds=rounds,
+                    bcrypt__min_rounds=rounds,
+                    bcrypt__max_rounds=rounds,
+                )
+                cls.rounds = rounds
+            return cls.rounds
+
+
+class PasswordStats:
+    calls = 0
+    rejected = 0
+    total_time = 0.0
+    max_time = 0.0
+    lock = threading.Lock()
+
+    @classmethod
+    def record(cls, elapsed):
+        with cls.lock:
+            cls.calls += 1
+            cls.total_time += elapsed
+            cls.max_time = max(cls.max_time, elapsed)
+
+    @classmethod
+    def reject(cls):
+        with cls.lock:
+            cls.rejected += 1
+
+    @classmethod
+    def stats(cls):
+        with cls.lock:
+            return {
+                "calls": cls.calls,
+                "rejected": cls.rejected,
+                "in_flight": PasswordPool.pending,
+                "rounds": PasswordPolicy.rounds,
+                "avg_ms": cls.total_time / cls.calls * 1000 if cls.calls else 0.0,
+                "max_ms": cls.max_time * 1000
+            }
+
+
+class PasswordPool:
+    # bcrypt is deliberately slow, so it runs on a few dedicated threads
+    # instead of the event loop or the shared request thread pool. Calls
+    # beyond the workers and PASSWORD_QUEUE_SIZE waiting ones are rejected.
+    executor = None
+    pending = 0
+    lock = threading.Lock()
+
+    @classmethod
+    def _admit(cls):
+        with cls.lock:
+            if cls.pending >= app_settings.PASSWORD_WORKERS + app_settings.PASSWORD_QUEUE_SIZE:
+                PasswordStats.reject()
+                raise PasswordPoolBusy()
+            cls.pending += 1
+            if cls.executor is None:
+                cls.executor = ThreadPoolExecutor(
+                    max_workers=app_settings.PASSWORD_WORKERS, thread_name_prefix="password"
+                )
+            return cls.executor
+
+    @classmethod
+    def _release(cls, started):
+        with cls.lock:
+            cls.pending -= 1
+        PasswordStats.record(time.monotonic() - started)
+
+    @classmethod
+    def submit(cls, fn, *args):
+        # The slot is released when the job finishes, not when its caller
+        # stops waiting, so cancelled requests can not oversubscribe the pool
+        executor = cls._admit()
+        started = time.monotonic()
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            cls._release(started)
+            raise
+        future.add_done_callback(lambda future: cls._release(started))
+        return future
+
+    @classmethod
+    async def run(cls, fn, *args):
+        return await asyncio.wrap_future(cls.submit(fn, *args))
+
+    @classmethod
+    def call(cls, fn, *args):
+        # For callers that are already off the event loop
+        return cls.submit(fn, *args).result()
+
+    @classmethod
+    def shutdown(cls):
+        with cls.lock:
+            if cls.executor is not None:
+                cls.executor.shutdown(wait=False, cancel_futures=True)
+                cls.executor = None
+
+
+def hash_password(password):
+    return PasswordPool.call(pwd_context.hash, password)
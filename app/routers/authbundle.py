@@ -17,19 +17,30 @@
 
 import uuid
 
-from fastapi import APIRouter, Form, File, Depends, UploadFile, HTTPException, status, Response
+from fastapi import (
+    APIRouter,
+    Form,
+    File,
+    Depends,
+    UploadFile,
+    HTTPException,
+    status,
+    Response,
+    Query,
+)
 from fastapi.security import OAuth2PasswordBearer
 from fastapi.responses import JSONResponse
 from typing import Optional, List
 
 from sqlalchemy import exc
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, load_only
 
 import app.settings as settings
 import app.schemas.autbundle as autbundle_schema
 from app.models.authbundle import Authbundle
-from app.database_setup import auth_engine
+from app.dependencies import get_auth_db
 from app.auth import authenticate
+from app.list_query import ListParams, paginate, equal_filter, prefix_filter
 
 
 router = APIRouter(tags=["authbundle"])
@@ -46,7 +57,8 @@ async def authbundle_create(
     username: Optional[str] = Form(None),
     password: Optional[str] = Form(None),
     description: Optional[str] = Form(None),
-    keyfile: Optional[UploadFile] = File(None)
+    keyfile: Optional[UploadFile] = File(None),
+    session: Session = Depends(get_auth_db),
 ):
     if not authbundle_id:
         authbundle_id = uuid.uuid4().hex
@@ -65,7 +77,6 @@ async def authbundle_create(
         authbundle.keyname=keyfile.filename
         authbundle.keydata=content
 
-    session = sessionmaker(bind=auth_engine)()
     session.add(authbundle)
     try:
         session.commit()
@@ -76,8 +87,6 @@ async def authbundle_create(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="Authentication bundle [{}] already exist".format(authbundle_id),
         )
-    finally:
-        session.close()
 
     return JSONResponse(content={"authbundle_id": authbundle_id})
 
@@ -87,17 +96,35 @@ async def authbundle_create(
     response_model=list[autbundle_schema.AuthbundleListResponse],
     dependencies=[Depends(authenticate)]
 )
-async def authbundle_list():
-    session = sessionmaker(bind=auth_engine)()
-    try:
-        return session.query(Authbundle).all()
-    finally:
-        session.close()
+async def authbundle_list(
+    response: Response,
+    params: ListParams = Depends(),
+    service_type: str | None = None,
+    auth_type: str | None = None,
+    description: str | None = Query(None, description="Description prefix"),
+    session: Session = Depends(get_auth_db),
+):
+    query = session.query(Authbundle).options(
+        load_only(
+            Authbundle.authbundle_id,
+            Authbundle.service_type,
+            Authbundle.auth_type,
+            Authbundle.description,
+        )
+    )
+    query = equal_filter(query, Authbundle.service_type, service_type)
+    query = equal_filter(query, Authbundle.auth_type, auth_type)
+    query = prefix_filter(query, Authbundle.description, description)
+    return paginate(query, params, response, Authbundle.authbundle_id, {
+        "authbundle_id": Authbundle.authbundle_id,
+        "service_type": Authbundle.service_type,
+        "auth_type": Authbundle.auth_type,
+        "description": Authbundle.description
+    })
 
 
 @router.delete("/{authbundle_id}", dependencies=[Depends(authenticate)])
-async def authbundle_delete(authbundle_id: str):
-    session = sessionmaker(bind=auth_engine)()
+async def authbundle_delete(authbundle_id: str, session: Session = Depends(get_auth_db)):
     try:
         session.query(Authbundle).filter(Authbundle.authbundle_id == authbundle_id).delete()
         session.commit()
@@ -108,7 +135,6 @@ async def authbundle_delete(authbundle_id: str):
             detail="One or more authentication bundles could not be deleted",
         )
 
-    session.close()
     return Response(status_code=200)
 
 
@@ -120,10 +146,9 @@ async def authbundle_edit(
     username: Optional[str] = Form(None),
     password: Optional[str] = Form(None),
     description: Optional[str] = Form(""),
-    keyfile: Optional[UploadFile] = File(None)
+    keyfile: Optional[UploadFile] = File(None),
+    session: Session = Depends(get_auth_db),
 ):
-    session = sessionmaker(bind=auth_engine)()
-
     authbundle = session.query(Authbundle).filter(Authbundle.authbundle_id == authbundle_id).first()
     if not authbundle:
         raise HTTPException(
@@ -153,8 +178,6 @@ async def authbundle_edit(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         detail="Authentication bundle [{}] could not edited".format(authbundle_id),
         )
-    finally:
-        session.close()
 
     return JSONResponse(content={"authbundle_id": authbundle_id})
 
@@ -165,14 +188,13 @@ async def authbundle_edit(
     dependencies=[Depends(authenticate)]
 )
 async def authbundle_details(
-    authbundle_id: str
+    authbundle_id: str,
+    session: Session = Depends(get_auth_db),
 ):
-    session = sessionmaker(bind=auth_engine)()
     authbundle = session.query(Authbundle).filter(Authbundle.authbundle_id == authbundle_id).first()
     if not authbundle:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Authentication bundle not found"
         )
-    session.close()
-    return authbundle
\ No newline at end of file
+    return authbundle
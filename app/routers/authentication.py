@@ -20,14 +20,12 @@ import string
 import time
 
 from typing import Annotated, Optional
-from fastapi import APIRouter, Body, Form, Depends, HTTPException, status, Request, Response
+from fastapi import APIRouter, Body, Form, Depends, HTTPException, status, Request, Response, Query
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy.orm import sessionmaker
 from sqlalchemy import exc
 
-from passlib.context import CryptContext
 from pydantic import BaseModel, ValidationError
 import app.settings as settings
 from datetime import datetime, timedelta, timezone
@@ -37,17 +35,15 @@ import app.schemas.user as user_schema
 import app.schemas.api_token as api_token_schema
 
 from app.dependencies import get_db
-from app.auth import authenticate, create_access_token
-from app.database_setup import default_engine
+from app.auth import authenticate, create_access_token, api_token_cache
+from app.passwords import pwd_context, PasswordPool, PasswordPoolBusy
+from app.list_query import ListParams, paginate, equal_filter, prefix_filter
 from app.components.settings import Settings
-from app.models.api_token import ApiToken, ApitokenState
-
+from app.models.api_token import ApiToken, ApitokenState, hash_token
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=settings.TOKEN_AUTH_URL)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 class Token(BaseModel):
     access_token: str
@@ -67,12 +63,16 @@ def authentication_status():
 
 def authenticate_user(db_session, username: str, password: str):
     try:
-        user = user_crud.get_user_by_username(db_session, username)
-        if not user:
+        db_user = user_crud.get_user_by_username(db_session, username)
+        if not db_user:
             return None
-        user = user_schema.UserAuth.model_validate(user)
-        if not pwd_context.verify(password, user.hashed_password):
+        user = user_schema.UserAuth.model_validate(db_user)
+        valid, new_hash = pwd_context.verify_and_update(password, user.hashed_password)
+        if not valid:
             return None
+        if new_hash:
+            # Cost of the stored hash differs from the current policy
+            user_crud.update_hashed_password(db_session, db_user, new_hash)
         return user
     except ValidationError:
         credentials_exception = HTTPException(
@@ -96,11 +96,11 @@ async def get_current_user(
     if username is None:
         raise credentials_exception
     try:
-        user = user_schema.User.model_validate(
-            user_crud.get_user_by_username(db_session, username)
-        )
+        user = user_crud.get_principal(db_session, username)
     except ValidationError:
         raise credentials_exception
+    if user is None:
+        raise credentials_exception
     return user
 
 
@@ -127,7 +127,16 @@ async def login_for_access_token(
     if not Settings().api_authentication:
         return Response(status_code=status.HTTP_204_NO_CONTENT)
 
-    user = authenticate_user(db_session, form_data.username, form_data.password)
+    try:
+        user = await PasswordPool.run(
+            authenticate_user, db_session, form_data.username, form_data.password
+        )
+    except PasswordPoolBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress",
+            headers={"Retry-After": "1"},
+        )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -140,16 +149,18 @@ async def login_for_access_token(
 
 
 @router.post("/apitoken", dependencies=[Depends(authenticate)])
-async def create_api_token(request: api_token_schema.ApiTokenRequest):
+async def create_api_token(
+    request: api_token_schema.ApiTokenRequest, session: Session = Depends(get_db)
+):
     characters = string.ascii_letters + string.digits
     now = int(time.time())
     till = now + request.duration * 86400 if request.duration else 0
-    session = sessionmaker(bind=default_engine)()
     for _ in range(2):
         token = ''.join(secrets.choice(characters) for _ in range(50))
         api_token = ApiToken(
-            token=token,
-            state=request.description or 1,
+            token_hash=hash_token(token),
+            token_prefix=token[:settings.API_TOKEN_PREFIX_LENGTH],
+            state=request.state or ApitokenState.VAILD,
             created=now,
             till=till,
             description=request.description
@@ -160,47 +171,73 @@ async def create_api_token(request: api_token_schema.ApiTokenRequest):
         except exc.IntegrityError:
             session.rollback()
             continue
-        api_token.id
-        session.close()
+        api_token_cache.pop(api_token.token_hash)
         break
     else:
         raise HTTPException(status_code=500)
 
-    return JSONResponse(content={"apitoken_id": api_token.id})
-
-
-@router.get("/apitoken/", dependencies=[Depends(authenticate)])
-async def list_apitoken():
-    session = sessionmaker(bind=default_engine)()
-    try:
-        return session.query(ApiToken).all()
-    finally:
-        session.close()
+    # The only time the token itself is available
+    return JSONResponse(content={"apitoken_id": api_token.id, "token": token})
+
+
+@router.get(
+    "/apitoken/",
+    response_model=list[api_token_schema.ApiTokenResponse],
+    dependencies=[Depends(authenticate)]
+)
+async def list_apitoken(
+    response: Response,
+    params: ListParams = Depends(),
+    state: int | None = None,
+    description: str | None = Query(None, description="Description prefix"),
+    session: Session = Depends(get_db),
+):
+    query = equal_filter(session.query(ApiToken), ApiToken.state, state)
+    query = prefix_filter(query, ApiToken.description, description)
+    return paginate(
+        query,
+        params,
+        response,
+        ApiToken.id,
+        {
+            "id": ApiToken.id,
+            "created": ApiToken.created,
+            "till": ApiToken.till,
+            "state": ApiToken.state,
+        },
+    )
 
 
-@router.get("/apitoken/{apitoken_id}", dependencies=[Depends(authenticate)])
+@router.get(
+    "/apitoken/{apitoken_id}",
+    response_model=api_token_schema.ApiTokenResponse,
+    dependencies=[Depends(authenticate)]
+)
 async def get_apitoken(
-    apitoken_id: str
+    apitoken_id: str,
+    session: Session = Depends(get_db),
 ):
-    session = sessionmaker(bind=default_engine)()
     apitoken = session.query(ApiToken).filter(ApiToken.id == apitoken_id).first()
     if not apitoken:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Apitoken not found"
         )
-    session.close()
     return apitoken
 
 
-@router.put("/apitoken/{apitoken_id}", dependencies=[Depends(authenticate)])
+@router.put(
+    "/apitoken/{apitoken_id}",
+    response_model=api_token_schema.ApiTokenResponse,
+    dependencies=[Depends(authenticate)]
+)
 async def update_apitoken(
     apitoken_id: str,
     state: ApitokenState = Body(...),
     duration: int = Body(...),
     description: Optional[str] = Body(...),
+    session: Session = Depends(get_db),
 ):
-    session = sessionmaker(bind=default_engine)()
     apitoken = session.query(ApiToken).filter(ApiToken.id == apitoken_id).first()
     if not apitoken:
         raise HTTPException(
@@ -222,14 +259,14 @@ async def update_apitoken(
         detail="Apitoken [{}] can not be updated".format(apitoken_id),
         )
     finally:
-        session.close()
+        api_token_cache.pop(apitoken.token_hash)
 
     return apitoken
 
 
 @router.delete("/apitoken/{apitoken_id}", dependencies=[Depends(authenticate)])
-async def delete_apitoken(apitoken_id: int):
-    session = sessionmaker(bind=default_engine)()
+async def delete_apitoken(apitoken_id: int, session: Session = Depends(get_db)):
+    token_hash = session.query(ApiToken.token_hash).filter(ApiToken.id == apitoken_id).scalar()
     try:
         session.query(ApiToken).filter(ApiToken.id == apitoken_id).delete()
         session.commit()
@@ -240,6 +277,6 @@ async def delete_apitoken(apitoken_id: int):
             detail="Apitoken could not be deleted",
         )
     finally:
-        session.close()
+        api_token_cache.pop(token_hash)
 
     return Response(status_code=200)
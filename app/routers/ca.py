@@ -18,19 +18,30 @@
 import shutil
 import os
 
-from fastapi import APIRouter, Form, File, Depends, UploadFile, HTTPException, status, Response
+from fastapi import (
+    APIRouter,
+    Form,
+    File,
+    Depends,
+    UploadFile,
+    HTTPException,
+    status,
+    Response,
+    Query,
+)
 from fastapi.security import OAuth2PasswordBearer
 from fastapi.responses import JSONResponse
 from typing import Optional, List
 
 from sqlalchemy import exc
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session
 
 import app.settings as settings
 from app.schemas.metadata import MetaDataListResponse, MetaDataDetailsResponse
 from app.models.meta_data import MetaData
-from app.database_setup import default_engine
+from app.dependencies import get_db
 from app.auth import authenticate
+from app.list_query import ListParams, paginate, prefix_filter
 
 
 router = APIRouter(tags=["ca"])
@@ -44,6 +55,7 @@ async def ca_add(
     cafile: UploadFile = File(...),
     ca_id: Optional[str] = Form(None),
     description: Optional[str] = Form(None),
+    session: Session = Depends(get_db),
 ):
     if not ca_id:
         ca_id = cafile.filename
@@ -59,7 +71,6 @@ async def ca_add(
         description=description
     )
 
-    session = sessionmaker(bind=default_engine)()
     session.add(file_meta)
     try:
         session.commit()
@@ -69,8 +80,6 @@ async def ca_add(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="File with ID [{}] already exist".format(ca_id),
         )
-    finally:
-        session.close()
 
     with open(f"/gnode/storage/ca/{ca_id}", "wb") as buffer:
         shutil.copyfileobj(cafile.file, buffer)
@@ -83,17 +92,20 @@ async def ca_add(
     response_model=list[MetaDataListResponse],
     dependencies=[Depends(authenticate)]
 )
-async def ca_list():
-    session = sessionmaker(bind=default_engine)()
-    try:
-        return session.query(MetaData).all()
-    finally:
-        session.close()
+async def ca_list(
+    response: Response,
+    params: ListParams = Depends(),
+    description: str | None = Query(None, description="Description prefix"),
+    session: Session = Depends(get_db),
+):
+    query = prefix_filter(session.query(MetaData), MetaData.description, description)
+    return paginate(query, params, response, MetaData.id, {
+        "id": MetaData.id, "description": MetaData.description
+    })
 
 
 @router.delete("/{ca_id}", dependencies=[Depends(authenticate)])
-async def ca_delete(ca_id: str):
-    session = sessionmaker(bind=default_engine)()
+async def ca_delete(ca_id: str, session: Session = Depends(get_db)):
     try:
         session.query(MetaData).filter(MetaData.id == ca_id).delete()
         session.commit()
@@ -103,7 +115,6 @@ async def ca_delete(ca_id: str):
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="One or more authentication bundles could not be deleted",
         )
-    session.close()
 
     os.unlink(f"/gnode/storage/ca/{ca_id}")
 
@@ -114,10 +125,9 @@ async def ca_delete(ca_id: str):
 async def ca_edit(
     ca_id: str,
     description: Optional[str] = Form(""),
-    cafile: Optional[UploadFile] = File(None)
+    cafile: Optional[UploadFile] = File(None),
+    session: Session = Depends(get_db),
 ):
-    session = sessionmaker(bind=default_engine)()
-
     file_meta = session.query(MetaData).filter(MetaData.id == ca_id).first()
     if not file_meta:
         raise HTTPException(
@@ -133,8 +143,6 @@ async def ca_edit(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         detail="Authentication bundle [{}] could not edited".format(ca_id),
         )
-    finally:
-        session.close()
 
     if cafile:
         with open(f"/gnode/storage/ca/{ca_id}", "wb") as buffer:
@@ -149,14 +157,13 @@ async def ca_edit(
     dependencies=[Depends(authenticate)]
 )
 async def ca_details(
-    ca_id: str
+    ca_id: str,
+    session: Session = Depends(get_db),
 ):
-    session = sessionmaker(bind=default_engine)()
     file_meta = session.query(MetaData).filter(MetaData.id == ca_id).first()
     if not file_meta:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File not found"
         )
-    session.close()
-    return file_meta
\ No newline at end of file
+    return file_meta
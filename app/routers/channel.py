@@ -31,13 +31,19 @@ router = APIRouter(tags=["channel"])
 
 
 @router.get("/", dependencies=[Depends(authenticate)])
-async def list_channels():
-    return Response(content=Channel().list(), media_type="application/json")
+async def list_channels(backends: bool = False):
+    channels, backend_status = await Channel().list()
+    if backends:
+        # Lets clients tell an empty backend from one that did not answer
+        content = {"channels": channels, "backends": backend_status}
+    else:
+        content = channels
+    return Response(content=json.dumps(content), media_type="application/json")
 
 
 @router.get("/{channel_id}", dependencies=[Depends(authenticate)])
 async def get_channel(channel_id: str):
-    channel = Channel().get(channel_id)
+    channel = await Channel().get(channel_id)
     if channel is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -54,7 +60,7 @@ async def create_channel(_: dict = Body(...)):
 @router.post("/{channel_id}", dependencies=[Depends(authenticate)])
 async def create_channel(channel_id: str, payload: dict = Body(...)):
     try:
-        response_phrase = Channel().create(channel_id, payload)
+        response_phrase = await Channel().create(channel_id, payload)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     if response_phrase:
@@ -66,7 +72,7 @@ async def create_channel(channel_id: str, payload: dict = Body(...)):
 async def update_channel(channel_id: str, request: Request):
     payload = await request.body()
     try:
-        response_phrase = Channel().update(channel_id, payload)
+        response_phrase = await Channel().update(channel_id, payload)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     if response_phrase:
@@ -76,7 +82,7 @@ async def update_channel(channel_id: str, request: Request):
 
 @router.delete("/{channel_id}", dependencies=[Depends(authenticate)])
 async def delete_channel(channel_id: str):
-    response_phrase = Channel().delete(channel_id)
+    response_phrase = await Channel().delete(channel_id)
     if response_phrase:
         return PlainTextResponse(status_code=400, content=response_phrase)
     return Response()
\ No newline at end of file
@@ -17,19 +17,20 @@
 
 import uuid
 
-from fastapi import APIRouter, Form, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Form, Depends, HTTPException, status, Response, Query
 from fastapi.security import OAuth2PasswordBearer
 from fastapi.responses import JSONResponse
 from typing import Optional, List
 
 from sqlalchemy import exc
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, load_only
 
 import app.settings as settings
 import app.schemas.converter as converter_schema
 from app.models.converter import Converter
-from app.database_setup import default_engine
+from app.dependencies import get_db
 from app.auth import authenticate
+from app.list_query import ListParams, paginate, prefix_filter
 
 
 router = APIRouter(tags=["converter"])
@@ -43,6 +44,7 @@ async def converter_create(
     converter_id: Optional[str] = Form(None),
     code: str = Form(...),
     description: Optional[str] = Form(None),
+    session: Session = Depends(get_db),
 ):
     if not converter_id:
         converter_id = uuid.uuid4().hex
@@ -53,7 +55,6 @@ async def converter_create(
         description=description
     )
 
-    session = sessionmaker(bind=default_engine)()
     session.add(converter)
     try:
         session.commit()
@@ -64,8 +65,6 @@ async def converter_create(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="Converter [{}] already exist".format(converter_id),
         )
-    finally:
-        session.close()
 
     return JSONResponse(content={"converter_id": converter_id})
 
@@ -75,17 +74,21 @@ async def converter_create(
     response_model=list[converter_schema.ConverterListResponse],
     dependencies=[Depends(authenticate)]
 )
-async def converter_list():
-    session = sessionmaker(bind=default_engine)()
-    try:
-        return session.query(Converter).all()
-    finally:
-        session.close()
+async def converter_list(
+    response: Response,
+    params: ListParams = Depends(),
+    description: str | None = Query(None, description="Description prefix"),
+    session: Session = Depends(get_db),
+):
+    query = session.query(Converter).options(load_only(Converter.id, Converter.description))
+    query = prefix_filter(query, Converter.description, description)
+    return paginate(query, params, response, Converter.id, {
+        "id": Converter.id, "description": Converter.description
+    })
 
 
 @router.delete("/{converter_id}", dependencies=[Depends(authenticate)])
-async def converter_delete(converter_id: str):
-    session = sessionmaker(bind=default_engine)()
+async def converter_delete(converter_id: str, session: Session = Depends(get_db)):
     try:
         session.query(Converter).filter(Converter.id == converter_id).delete()
         session.commit()
@@ -95,7 +98,6 @@ async def converter_delete(converter_id: str):
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="One or more converters could not be deleted",
         )
-    session.close()
     return Response(status_code=200)
 
 
@@ -104,9 +106,8 @@ async def converter_edit(
     converter_id: str,
     code: str = Form(...),
     description: Optional[str] = Form(None),
+    session: Session = Depends(get_db),
 ):
-    session = sessionmaker(bind=default_engine)()
-
     converter = session.query(Converter).filter(Converter.id == converter_id).first()
     if not converter:
         raise HTTPException(
@@ -126,8 +127,6 @@ async def converter_edit(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         detail="Converter [{}] could not edited".format(converter_id),
         )
-    finally:
-        session.close()
 
     return JSONResponse(content={"converter_id": converter_id})
 
@@ -138,14 +137,13 @@ async def converter_edit(
     dependencies=[Depends(authenticate)]
 )
 async def converter_details(
-    converter_id: str
+    converter_id: str,
+    session: Session = Depends(get_db),
 ):
-    session = sessionmaker(bind=default_engine)()
     converter = session.query(Converter).filter(Converter.id == converter_id).first()
     if not converter:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Converter not found"
         )
-    session.close()
     return converter
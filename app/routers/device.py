@@ -30,20 +30,36 @@
 
 
 import io
+import os
 import json
-from datetime import timezone
-
-from PIL import Image
+import asyncio
+import base64
+import itertools
+from datetime import datetime, timezone
 
 import cbor2
 
-from fastapi import APIRouter, Form, File, Depends, UploadFile, HTTPException, status, Response
+from fastapi import (
+    APIRouter,
+    Form,
+    File,
+    Depends,
+    UploadFile,
+    HTTPException,
+    status,
+    Response,
+    Query,
+    Request,
+    Body,
+)
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
-from fastapi.responses import JSONResponse, StreamingResponse
-from typing import Optional, List
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse
+from typing import Any, Optional, List
 
-from sqlalchemy import exc, func
-from sqlalchemy.orm import sessionmaker
+from pydantic import ValidationError
+from sqlalchemy import exc, func, insert, tuple_
+from sqlalchemy.orm import load_only
 from sqlalchemy.orm import Session
 
 import app.settings as settings
@@ -51,13 +67,29 @@ import app.schemas.device as device_schema
 
 from app.dependencies import get_db
 from app.models.device import Device, DeviceData
-from app.database_setup import default_engine
 from app.database_setup import SessionLocalDefault
 from app.auth import authenticate
+from app.list_query import ListParams, paginate, equal_filter, prefix_filter
+from app.components import preview as preview_component
+from app.components import sensor_store
+from app.components import frame_store
+from app.components.frame_feed import frame_feed
 
 
 router = APIRouter(tags=["device"])
 
+# Frame fields clients can select, and the columns they are read from
+FRAME_FIELDS = {
+    "frame_id": DeviceData.id,
+    "device_id": DeviceData.device_id,
+    "created": DeviceData.created,
+    "data_frame": DeviceData.blob,
+    "sensor_data": DeviceData.sensor_data,
+}
+
+# Aggregates of /sensor-aggregates and their position in sensor_store.aggregate() rows
+SENSOR_AGGREGATES = {"count": 1, "min": 2, "max": 3, "avg": 4}
+
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=settings.TOKEN_AUTH_URL)
 
@@ -65,16 +97,19 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl=settings.TOKEN_AUTH_URL)
 @router.post("/{device_id}", dependencies=[Depends(authenticate)])
 async def device_create(
     device_id: str,
-    device: device_schema.DeviceCreateRequest
+    device: device_schema.DeviceCreateRequest,
+    session: Session = Depends(get_db),
 ):
     device = Device(
         id=device_id,
         type=device.type,
         enabled=device.enabled,
         description=device.description,
+        retention_max_age=device.retention_max_age,
+        retention_max_frames=device.retention_max_frames,
+        retention_max_bytes=device.retention_max_bytes,
     )
 
-    session = sessionmaker(bind=default_engine)()
     session.add(device)
     try:
         session.commit()
@@ -84,23 +119,150 @@ async def device_create(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="Device [{}] already exist".format(device_id),
         )
-    finally:
-        session.close()
 
     return Response(status_code=200)
 
 
+@router.post(
+    "/bulk/upsert",
+    response_model=list[device_schema.DeviceBulkResult],
+    dependencies=[Depends(authenticate)]
+)
+async def device_bulk_upsert(
+    items: list[Any] = Body(max_length=settings.DEVICE_BULK_MAX_ITEMS),
+    session: Session = Depends(get_db),
+):
+    # Items are validated one by one, so a bad item is reported without failing the others
+    return await run_in_threadpool(bulk_upsert, session, items)
+
+
+@router.post(
+    "/bulk/delete",
+    response_model=list[device_schema.DeviceBulkResult],
+    dependencies=[Depends(authenticate)]
+)
+async def device_bulk_delete(
+    ids: list[str] = Body(max_length=settings.DEVICE_BULK_MAX_ITEMS),
+    session: Session = Depends(get_db),
+):
+    return await run_in_threadpool(bulk_delete, session, ids)
+
+
+def load_devices(session, ids):
+    devices = {}
+    ids = list(set(ids))
+    # Keeps every IN list below SQLite's bound parameter limit
+    for start in range(0, len(ids), 500):
+        for device in session.query(Device).filter(Device.id.in_(ids[start:start + 500])):
+            devices[device.id] = device
+    return devices
+
+
+def bulk_upsert(session, items):
+    results = []
+    valid = []
+    for item in items:
+        try:
+            valid.append(device_schema.DeviceBulkUpsertItem.model_validate(item))
+            results.append(None)
+        except ValidationError as e:
+            item_id = item.get("id") if isinstance(item, dict) else None
+            results.append({"id": item_id if isinstance(item_id, str) else None, "status": "error",
+                            "detail": "; ".join(error["msg"] for error in e.errors())})
+            valid.append(None)
+
+    existing = load_devices(session, [item.id for item in valid if item is not None])
+    seen = set()
+    new_devices = []
+    for index, item in enumerate(valid):
+        if item is None:
+            continue
+        if item.id in seen:
+            results[index] = {
+                "id": item.id,
+                "status": "error",
+                "detail": "Duplicate id in request",
+            }
+            continue
+        seen.add(item.id)
+        device = existing.get(item.id)
+        if device is None:
+            new_devices.append(item.model_dump())
+            results[index] = {"id": item.id, "status": "created"}
+        else:
+            # Only fields present in the item change an existing device
+            for field in item.model_fields_set - {"id"}:
+                setattr(device, field, getattr(item, field))
+            results[index] = {"id": item.id, "status": "updated"}
+
+    if new_devices:
+        session.execute(insert(Device), new_devices)
+    try:
+        session.commit()
+    except exc.SQLAlchemyError:
+        session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Devices could not be saved",
+        )
+    return results
+
+
+def bulk_delete(session, ids):
+    existing = load_devices(session, ids)
+    results = []
+    for device_id in ids:
+        if device_id in existing:
+            results.append({"id": device_id, "status": "deleted"})
+        else:
+            results.append({"id": device_id, "status": "not_found"})
+    existing = list(existing)
+    for start in range(0, len(existing), 500):
+        session.query(Device).filter(Device.id.in_(existing[start : start + 500])).delete(
+            synchronize_session=False
+        )
+    try:
+        session.commit()
+    except exc.SQLAlchemyError:
+        session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="One or more devices could not be deleted",
+        )
+    return results
+
+
 @router.get(
     "/",
     response_model=list[device_schema.DeviceListResponse],
     dependencies=[Depends(authenticate)]
 )
-async def device_list():
-    session = sessionmaker(bind=default_engine)()
-    try:
-        return session.query(Device).all()
-    finally:
-        session.close()
+async def device_list(
+    response: Response,
+    params: ListParams = Depends(),
+    type: str | None = None,
+    enabled: bool | None = None,
+    description: str | None = Query(None, description="Description prefix"),
+    session: Session = Depends(get_db),
+):
+    query = session.query(Device).options(
+        load_only(Device.id, Device.type, Device.enabled, Device.description)
+    )
+    query = equal_filter(query, Device.type, type)
+    query = equal_filter(query, Device.enabled, enabled)
+    query = prefix_filter(query, Device.description, description)
+    return paginate(
+        query,
+        params,
+        response,
+        Device.id,
+        {
+            "id": Device.id,
+            "type": Device.type,
+            "enabled": Device.enabled,
+            "description": Device.description,
+        },
+    )
 
 
 @router.get(
@@ -109,22 +271,20 @@ async def device_list():
     dependencies=[Depends(authenticate)]
 )
 async def device_details(
-    device_id: str
+    device_id: str,
+    session: Session = Depends(get_db),
 ):
-    session = sessionmaker(bind=default_engine)()
     device = session.query(Device).filter(Device.id == device_id).first()
     if not device:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Device not found"
         )
-    session.close()
     return device
 
 
 @router.delete("/{device_id}", dependencies=[Depends(authenticate)])
-async def device_delete(device_id: str):
-    session = sessionmaker(bind=default_engine)()
+async def device_delete(device_id: str, session: Session = Depends(get_db)):
     try:
         session.query(Device).filter(Device.id == device_id).delete()
         session.commit()
@@ -135,17 +295,15 @@ async def device_delete(device_id: str):
             detail="One or more devices could not be deleted",
         )
 
-    session.close()
     return Response(status_code=200)
 
 
 @router.put("/{device_id}", dependencies=[Depends(authenticate)])
 async def device_edit(
     device_id: str,
-    input: device_schema.DeviceUpdateRequest
+    input: device_schema.DeviceUpdateRequest,
+    session: Session = Depends(get_db),
 ):
-    session = sessionmaker(bind=default_engine)()
-
     device = session.query(Device).filter(Device.id == device_id).first()
     if not device:
         raise HTTPException(
@@ -159,6 +317,9 @@ async def device_edit(
         device.enabled = input.enabled
     if device.description is not None:
         device.description = input.description
+    for limit in ("retention_max_age", "retention_max_frames", "retention_max_bytes"):
+        if getattr(input, limit) is not None:
+            setattr(device, limit, getattr(input, limit))
 
     try:
         session.commit()
@@ -168,8 +329,6 @@ async def device_edit(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         detail="Device [{}] could not edited".format(device_id),
         )
-    finally:
-        session.close()
 
     return Response(status_code=200)
 
@@ -186,16 +345,15 @@ async def device_data(
     device_id: str,
     frame_id: str | int,
     preview: bool = False,
+    width: int = settings.PREVIEW_DEFAULT_WIDTH,
+    fields: str | None = None,
     session: Session = Depends(get_db),
 ):
-    if frame_id != "latest":
-        row = session.query(DeviceData).filter(DeviceData.id == frame_id).scalar()
-    else:
-        row = (session.query(DeviceData)
-                .filter(DeviceData.device_id == device_id)
-                .order_by(DeviceData.id.desc())
-                .first()
-    )
+    check_preview_width(width)
+    fields = parse_fields(fields)
+    preview_width = width if preview else None
+    row = query_frame(session.query(DeviceData).options(load_fields(fields, preview_width)),
+        device_id, frame_id)
 
     if not row:
         raise HTTPException(
@@ -203,18 +361,15 @@ async def device_data(
             detail="Device data not found"
         )
 
-    data = {
-        "frame_id": row.id,
-        "device_id": row.device_id,
-        "created": row.created,
-        "data_frame": row.preview or make_preview(row.blob, 300) if preview and row.blob else row.blob,
-    }
-
-    if row.sensor_data is not None:
-        if type(row.sensor_data) is bytes:
-            data["sensor_data"] = json.loads(row.sensor_data.decode())
+    data_frame = None
+    if "data_frame" in fields:
+        if preview_width:
+            data_frame = await run_in_threadpool(
+                preview_component.get_preview, session, row, width
+            )
         else:
-            data["sensor_data"] = row.sensor_data
+            data_frame = frame_store.read_frame(row)
+    data = frame_to_dict(row, data_frame, fields)
 
     buffer = io.BytesIO()
     cbor2.dump(data, buffer, timezone=timezone.utc)
@@ -223,71 +378,465 @@ async def device_data(
     return StreamingResponse(buffer, media_type="application/octet-stream")
 
 
+@router.get(
+    "/{device_id}/frame/{frame_id}/raw",
+    dependencies=[Depends(authenticate)]
+)
+async def device_frame_raw(
+    request: Request,
+    device_id: str,
+    frame_id: str | int,
+    preview: bool = False,
+    width: int = settings.PREVIEW_DEFAULT_WIDTH,
+    session: Session = Depends(get_db),
+):
+    # The bare image. Offloaded frames are sent from their file without being read into Python.
+    # Frames never change, so the ETag only depends on the frame id and the preview width.
+    check_preview_width(width)
+    columns = [DeviceData.blob_ref]
+    if preview:
+        columns.append(DeviceData.preview)
+    row = query_frame(session.query(DeviceData).options(load_only(*columns)), device_id, frame_id)
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Device data not found"
+        )
+
+    etag = '"frame-{}{}"'.format(row.id, "-preview-{}".format(width) if preview else "")
+    headers = {
+        "ETag": etag,
+        # "latest" moves on to newer frames, so it is revalidated every time
+        "Cache-Control": (
+            "private, no-cache" if frame_id == "latest" else "private, max-age=31536000, immutable"
+        ),
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if preview:
+        content = await run_in_threadpool(preview_component.get_preview, session, row, width)
+    elif row.blob_ref is not None and os.path.exists(frame_store.frame_path(row.blob_ref)):
+        # FileResponse handles Range and If-Range itself
+        path = frame_store.frame_path(row.blob_ref)
+        with open(path, "rb") as frame:
+            media_type = frame_store.media_type(frame.read(8))
+        return FileResponse(path, media_type=media_type, headers=headers)
+    else:
+        content = row.blob
+
+    if not content:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Device data has no frame"
+        )
+    return bytes_response(request, content, frame_store.media_type(content[:8]), headers)
+
+
+@router.get(
+    "/{device_id}/live",
+    dependencies=[Depends(authenticate)]
+)
+async def device_live(
+    device_id: str,
+    preview: bool = False,
+):
+    # Server-Sent Events with one "frame" event per new frame of the device
+    return StreamingResponse(
+        live_events(device_id, preview),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def live_events(device_id, preview):
+    subscriber = frame_feed.subscribe(device_id, preview)
+    frame_feed.start()
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    subscriber.queue.get(), settings.FRAME_FEED_KEEPALIVE
+                )
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield "id: {}\nevent: frame\ndata: {}\n\n".format(event["frame_id"], json.dumps(event))
+    finally:
+        frame_feed.unsubscribe(subscriber)
+
+
+@router.get(
+    "/{device_id}/history",
+    dependencies=[Depends(authenticate)]
+)
+async def device_history(
+    device_id: str,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    cursor: str | None = None,
+    limit: int = Query(
+        settings.HISTORY_PAGE_DEFAULT_LIMIT, ge=1, le=settings.HISTORY_PAGE_MAX_LIMIT
+    ),
+    fields: str | None = None,
+    preview: bool = False,
+    width: int = settings.PREVIEW_DEFAULT_WIDTH,
+):
+    # Newest first, keyset paginated on (created, id), so every page is one
+    # seek on the (device_id, created) index. Frames without created are skipped.
+    check_preview_width(width)
+    fields = parse_fields(fields)
+    preview_width = width if preview else None
+
+    query = [DeviceData.device_id == device_id, DeviceData.created.is_not(None)]
+    if since is not None:
+        query.append(DeviceData.created >= to_utc(since))
+    if until is not None:
+        query.append(DeviceData.created < to_utc(until))
+    if cursor is not None:
+        query.append(tuple_(DeviceData.created, DeviceData.id) < tuple_(*decode_cursor(cursor)))
+
+    stream_session = SessionLocalDefault()
+    rows = (stream_session.query(DeviceData)
+        .options(load_fields(fields, preview_width))
+        .filter(*query)
+        .order_by(DeviceData.created.desc(), DeviceData.id.desc())
+        .limit(limit)
+        .yield_per(settings.HISTORY_STREAM_BATCH_SIZE)
+    )
+
+    return StreamingResponse(
+        stream_history_page(stream_session, rows, preview_width, fields, limit),
+        media_type="application/octet-stream"
+    )
+
+
 @router.get(
     "/{device_id}/history-data/{latest}-{count}",
     dependencies=[Depends(authenticate)]
 )
-async def device_data(
+async def device_history_data(
     device_id: str,
     latest: int,
     count: int,
     preview: bool = False,
+    width: int = settings.PREVIEW_DEFAULT_WIDTH,
+    fields: str | None = None,
     session: Session = Depends(get_db),
 ):
+    check_preview_width(width)
+    fields = parse_fields(fields)
+    preview_width = width if preview else None
     # We do not care about race conditions, since it's fine if is's not the super latest id
     latest_id = (session.query(func.max(DeviceData.id))
             .filter(DeviceData.device_id == device_id)
             .scalar()
     )
 
+    if latest_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Device history data not found"
+        )
+
     max_id = latest_id - latest
 
-    rows = (session.query(DeviceData)
+    # The response outlives the request scoped session, so the stream owns its own
+    stream_session = SessionLocalDefault()
+    rows = iter(stream_session.query(DeviceData)
+        .options(load_fields(fields, preview_width))
         .filter(DeviceData.device_id == device_id, DeviceData.id <= max_id)
         .order_by(DeviceData.id.desc())
         .limit(count)
-        .all()
+        .yield_per(settings.HISTORY_STREAM_BATCH_SIZE)
     )
 
-    if not rows:
+    first = next(rows, None)
+    if first is None:
+        stream_session.close()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Device history data not found"
         )
 
-    data = []
+    return StreamingResponse(
+        stream_cbor_array(stream_session, first, rows, preview_width, fields),
+        media_type="application/octet-stream"
+    )
+
+
+@router.get(
+    "/{device_id}/sensor-series",
+    dependencies=[Depends(authenticate)]
+)
+async def device_sensor_series(
+    device_id: str,
+    keys: str,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = Query(
+        settings.SENSOR_SERIES_MAX_POINTS, ge=1, le=settings.SENSOR_SERIES_MAX_POINTS
+    ),
+    session: Session = Depends(get_db),
+):
+    # Columnar series for charts: {"timestamps": [...], "values": {key: [...]}}.
+    # Timestamps are UNIX seconds, oldest first, missing values are null.
+    keys = [key.strip() for key in keys.split(",") if key.strip()]
+    query = [DeviceData.device_id == device_id, DeviceData.created.is_not(None)]
+    if since is not None:
+        query.append(DeviceData.created >= to_utc(since))
+    if until is not None:
+        query.append(DeviceData.created < to_utc(until))
+    rows = (session.query(DeviceData.created, DeviceData.sensor_data)
+        .filter(*query)
+        .order_by(DeviceData.created.desc(), DeviceData.id.desc())
+        .limit(limit)
+    )
+    series = await run_in_threadpool(sensor_series, rows, keys)
+    return JSONResponse(content=series)
+
+
+def sensor_series(rows, keys):
+    timestamps = []
+    values = {key: [] for key in keys}
+    for created, sensor_data in reversed(rows.all()):
+        timestamps.append(sensor_store.to_timestamp(created))
+        sensor_data = sensor_store.parse_sensor_data(sensor_data)
+        for key in keys:
+            values[key].append(sensor_data.get(key))
+    return {"timestamps": timestamps, "values": values}
+
+
+@router.get(
+    "/{device_id}/sensor-aggregates",
+    dependencies=[Depends(authenticate)]
+)
+async def device_sensor_aggregates(
+    device_id: str,
+    metric: str,
+    bucket: str = "1h",
+    agg: str = "min,max,avg",
+    since: datetime | None = None,
+    until: datetime | None = None,
+    session: Session = Depends(get_db),
+):
+    # Downsampled series: {"timestamps": [bucket starts], "values": {agg: [...]}}.
+    # bucket is 1m, 1h, 1d (served from rollups) or a number of seconds.
+    aggs = [name.strip() for name in agg.split(",") if name.strip()]
+    if not aggs or any(name not in SENSOR_AGGREGATES for name in aggs):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="agg must be a comma separated subset of {}".format(list(SENSOR_AGGREGATES))
+        )
+    seconds = settings.SENSOR_ROLLUP_RESOLUTIONS.get(bucket)
+    if seconds is None:
+        try:
+            seconds = int(bucket)
+        except ValueError:
+            seconds = 0
+        if seconds <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="bucket must be one of {} or a positive number of seconds".format(
+                    list(settings.SENSOR_ROLLUP_RESOLUTIONS))
+            )
+    if since is not None:
+        since = sensor_store.to_timestamp(to_utc(since))
+    if until is not None:
+        until = sensor_store.to_timestamp(to_utc(until))
+    rows = await run_in_threadpool(
+        sensor_store.aggregate, session, device_id, metric, seconds, since, until
+    )
+    return JSONResponse(content={
+        "timestamps": [row[0] for row in rows],
+        "values": {name: [row[SENSOR_AGGREGATES[name]] for row in rows] for name in aggs}
+    })
+
+
+def stream_cbor_array(session, first, rows, preview_width, fields=FRAME_FIELDS):
+    # CBOR indefinite-length array, so items are encoded and sent one at a time
+    pending = []
+    try:
+        yield b"\x9f"
+        yield from encode_frames(
+            session, itertools.chain([first], rows), preview_width, fields, pending
+        )
+        yield b"\xff"
+    finally:
+        close_stream_session(session, pending)
+
+
+def stream_history_page(session, rows, preview_width, fields, limit):
+    # {"frames": [...], "next_cursor": ...}, the cursor is only known after the last frame
+    pending = []
+    count = 0
+    last = None
+    try:
+        yield b"\xa2" + cbor2.dumps("frames") + b"\x9f"
+        for row in rows:
+            count += 1
+            last = row
+            yield from encode_frames(session, [row], preview_width, fields, pending)
+        yield b"\xff" + cbor2.dumps("next_cursor")
+        # A short page is the last one
+        yield cbor2.dumps(encode_cursor(last.created, last.id) if count == limit else None)
+    finally:
+        close_stream_session(session, pending)
+
+
+def encode_frames(session, rows, preview_width, fields, pending):
     for row in rows:
-        el = {
-                "frame_id": row.id,
-                "device_id": row.device_id,
-                "created": row.created,
-                "data_frame": row.preview or make_preview(row.blob, 300) if preview and row.blob else row.blob
-        }
-
-        if row.sensor_data is not None:
-            if type(row.sensor_data) is bytes:
-                el["sensor_data"] = json.loads(row.sensor_data.decode())
+        data_frame = None
+        if "data_frame" in fields:
+            if preview_width:
+                data_frame = preview_component.get_preview(session, row, preview_width, pending)
             else:
-                el["sensor_data"] = row.sensor_data
+                data_frame = frame_store.read_frame(row)
+        yield cbor2.dumps(frame_to_dict(row, data_frame, fields), timezone=timezone.utc)
 
-        data.append(el)
 
-    buffer = io.BytesIO()
-    cbor2.dump(data, buffer, timezone=timezone.utc)
-    buffer.seek(0)
+def close_stream_session(session, pending):
+    # New previews are stored once the read session no longer holds the database
+    session.close()
+    if pending:
+        preview_component.store_previews(pending)
+
+
+def frame_to_dict(row, data_frame, fields=FRAME_FIELDS):
+    # Only touches the requested columns, others may not be loaded
+    data = {}
+    if "frame_id" in fields:
+        data["frame_id"] = row.id
+    if "device_id" in fields:
+        data["device_id"] = row.device_id
+    if "created" in fields:
+        data["created"] = row.created
+    if "data_frame" in fields:
+        data["data_frame"] = data_frame
+
+    if "sensor_data" in fields and row.sensor_data is not None:
+        if type(row.sensor_data) is bytes:
+            data["sensor_data"] = json.loads(row.sensor_data.decode())
+        else:
+            data["sensor_data"] = row.sensor_data
+
+    return data
+
+
+def parse_fields(fields):
+    if fields is None:
+        return list(FRAME_FIELDS)
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in FRAME_FIELDS]
+    if unknown or not names:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Fields must be a comma separated subset of {}".format(list(FRAME_FIELDS))
+        )
+    return names
+
+
+def load_fields(fields, preview_width):
+    # Skips the binary columns nobody asked for. With previews the blob is
+    # only loaded when a preview has to be generated.
+    columns = [FRAME_FIELDS[name] for name in fields if name != "data_frame"]
+    if "data_frame" in fields:
+        columns.append(DeviceData.preview if preview_width else DeviceData.blob)
+        columns.append(DeviceData.blob_ref)
+    return load_only(DeviceData.created, *columns)
 
-    return StreamingResponse(buffer, media_type="application/octet-stream")
 
+def encode_cursor(created, frame_id):
+    cursor = json.dumps([created.isoformat(), frame_id]).encode()
+    return base64.urlsafe_b64encode(cursor).decode().rstrip("=")
 
-def make_preview(blob, target_width):
-    img = Image.open(io.BytesIO(blob))
 
-    w_percent = (target_width / float(img.width))
-    target_height = int((float(img.height) * float(w_percent)))
-    resized_img = img.resize((target_width, target_height), Image.LANCZOS)
+def decode_cursor(cursor):
+    try:
+        created, frame_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created), int(frame_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Invalid cursor"
+        )
+
+
+def to_utc(value):
+    # created is stored as naive UTC
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def query_frame(query, device_id, frame_id):
+    if frame_id != "latest":
+        return query.filter(DeviceData.id == frame_id).scalar()
+    return (query
+        .filter(DeviceData.device_id == device_id)
+        .order_by(DeviceData.id.desc())
+        .first()
+    )
+
 
-    blob_buffer = io.BytesIO()
-    resized_img.save(blob_buffer, format="JPEG")
-    blob_buffer.seek(0)
+def etag_matches(if_none_match, etag):
+    # Weak comparison, as If-None-Match requires
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
 
-    return blob_buffer
+
+def parse_byte_range(range_header, size):
+    # Returns (start, end) of a single byte range, None to send the whole content.
+    # Multiple ranges are not supported and get the whole content too.
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start, separator, end = spec.strip().partition("-")
+    if not separator:
+        return None
+    try:
+        if start:
+            start = int(start)
+            end = int(end) if end else size - 1
+        else:
+            start, end = size - int(end), size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Range not satisfiable",
+            headers={"Content-Range": "bytes */{}".format(size)}
+        )
+    if end < start:
+        return None
+    return max(start, 0), min(end, size - 1)
+
+
+def bytes_response(request, content, media_type, headers):
+    headers = dict(headers, **{"Accept-Ranges": "bytes"})
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    byte_range = None
+    if range_header and (if_range is None or if_range == headers.get("ETag")):
+        byte_range = parse_byte_range(range_header, len(content))
+    if byte_range is None:
+        return Response(content=content, media_type=media_type, headers=headers)
+    start, end = byte_range
+    headers["Content-Range"] = "bytes {}-{}/{}".format(start, end, len(content))
+    return Response(
+        content=content[start:end + 1],
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=media_type,
+        headers=headers
+    )
+
+
+def check_preview_width(width):
+    if width not in settings.PREVIEW_WIDTHS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Preview width must be one of {}".format(list(settings.PREVIEW_WIDTHS))
+        )
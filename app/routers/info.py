@@ -31,8 +31,8 @@ async def get_info():
     mode = get_mode()
     api_versions = "{}.{}.{}".format(
         version.get_gnode_api_version(),
-        version.get_m2eb_api_version(),
-        version.get_mqbc_api_version()
+        await version.get_m2eb_api_version(),
+        await version.get_mqbc_api_version()
     )
     gnode_serial_number = version.get_serial_number()
 
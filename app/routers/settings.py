@@ -19,13 +19,14 @@ import zmq
 import cbor2
 
 from fastapi import APIRouter, Response, HTTPException, Depends, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 from typing import Any
 
 from app.routers import authentication
 from app.components import gnode_time, network_connections
 from app.components.settings import Settings
-from app.zmq_setup import zmq_context
+from app.zmq_client import zmq_request
 from app.auth import authenticate
 
 import app.settings as app_settings
@@ -36,20 +37,12 @@ router = APIRouter(tags=["settings"])
 
 @router.get("/", dependencies=[Depends(authenticate)])
 async def settings_get():
-    socket = zmq_context.socket(zmq.REQ)
-    socket.setsockopt(zmq.RCVTIMEO, 500)
-    socket.setsockopt(zmq.LINGER, 0)
-    socket.connect(app_settings.ZMQ_MQBC_SOCKET)
-
     response = {}
 
     try:
-        socket.send_string('')
-        message = socket.recv()
+        message = await zmq_request(app_settings.ZMQ_MQBC_SOCKET, b"", 500)
     except zmq.error.ZMQError:
         message = b"\x00"
-    finally:
-        socket.close()
     response["allow_anonymous"] = bool(message[0])
 
     try:
@@ -58,14 +51,16 @@ async def settings_get():
         response["time"] = {}
 
     try:
-        response["network_settings"] = network_connections.get_netwok_settings()
+        response["network_settings"] = await run_in_threadpool(
+            network_connections.get_netwok_settings
+        )
     except Exception as e:
         print(e)
         response["network_settings"] = {}
 
     settings = Settings()
     response["api_authentication"] = settings.api_authentication
-    response["gcloud"] = settings.gcloud
+    response["gcloud"] = await settings.get_gcloud()
 
     return JSONResponse(content=response)
 
@@ -77,17 +72,10 @@ async def settings_put(settings: dict[str, Any]):
     try:
         v = settings.get("allow_anonymous")
         if v is not None:
-            socket = zmq_context.socket(zmq.REQ)
-            socket.setsockopt(zmq.RCVTIMEO, 500)
-            socket.setsockopt(zmq.LINGER, 0)
-            socket.connect(app_settings.ZMQ_MQBC_SOCKET)
             try:
-                socket.send(b'\x01' if v else b'\x00')
-                socket.recv()
+                await zmq_request(app_settings.ZMQ_MQBC_SOCKET, b'\x01' if v else b'\x00', 500)
             except zmq.error.ZMQError:
                 pass
-            finally:
-                socket.close()
     except Exception as e:
         last_exc = e
 
@@ -108,14 +96,15 @@ async def settings_put(settings: dict[str, Any]):
     try:
         v = settings.get("api_authentication")
         if v is not None:
-            Settings().api_authentication = v
+            # The setter also writes to the database, so keep it off the event loop
+            await run_in_threadpool(setattr, Settings(), "api_authentication", v)
     except Exception as e:
         last_exc = e
 
     try:
         v = settings.get("gcloud")
         if v is not None:
-            Settings().gcloud = v
+            await Settings().set_gcloud(v)
     except Exception as e:
         last_exc = e
 
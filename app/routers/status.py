@@ -18,10 +18,16 @@
 from fastapi import APIRouter, Depends
 from fastapi.responses import JSONResponse
 
-from app.auth import authenticate
+from app.auth import authenticate, api_token_cache, jwt_cache
 from app.components import network_connections
-from app.components.status import get_service_status
+from app.components.status import service_registry
+from app.components.preview import PreviewStats
+from app.components.sensor_store import ExtractStats
+from app.components.retention import RetentionStats
+from app.passwords import PasswordStats
+from app.crud.users import principal_cache
 from app.utils import get_mode, GNodeMode
+from app.database_setup import default_engine, auth_engine, pool_stats
 
 import app.settings as app_settings
 
@@ -33,11 +39,33 @@ router = APIRouter(tags=["status"])
 @router.get("", dependencies=[Depends(authenticate)])
 async def status_get():
     response = {}
-    response["service"] = {
-        "mqbc": get_service_status(app_settings.MQBC_SERVICE_NAME),
-        "m2eb": get_service_status(app_settings.M2EB_SERVICE_NAME),
-        "gcloud_client": get_service_status(app_settings.GCLOUD_SERVICE_NAME)
-    }
+    response["service"] = {}
+    response["service_age"] = {}
+    for key, service_name in (
+        ("mqbc", app_settings.MQBC_SERVICE_NAME),
+        ("m2eb", app_settings.M2EB_SERVICE_NAME),
+        ("gcloud_client", app_settings.GCLOUD_SERVICE_NAME)
+    ):
+        service_status, age = service_registry.get(service_name)
+        response["service"][key] = service_status
+        response["service_age"][key] = round(age, 1)
     if get_mode() == GNodeMode.PHYSICAL:
         response["network"] = network_connections.get_network_status()
     return JSONResponse(content=response)
+
+
+@router.get("/metrics", dependencies=[Depends(authenticate)])
+async def metrics_get():
+    return JSONResponse(content={
+        "api_token_cache": api_token_cache.stats(),
+        "jwt_cache": jwt_cache.stats(),
+        "user_cache": principal_cache.stats(),
+        "preview_cache": PreviewStats.stats(),
+        "sensor_extract": ExtractStats.stats(),
+        "retention": RetentionStats.stats(),
+        "passwords": PasswordStats.stats(),
+        "db_pool": {
+            "default": pool_stats(default_engine),
+            "auth": pool_stats(auth_engine)
+        }
+    })
@@ -22,6 +22,7 @@ from typing import Annotated, List
 import app.crud.users as user_crud
 import app.schemas.user as user_schema
 from app.dependencies import get_db
+from app.passwords import PasswordPoolBusy
 
 from app.routers import authentication
 
@@ -48,6 +49,12 @@ def create_user(
         return user_crud.create_user(db_session=db_session, user=user)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except PasswordPoolBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many password operations in progress",
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
         raise HTTPException(status_code=500)
 
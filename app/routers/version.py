@@ -22,27 +22,27 @@ from fastapi import APIRouter, Depends
 
 import app.settings as app_settings
 
-from app.utils import send_zmq_request
+from app.zmq_client import zmq_request
 from app.auth import authenticate
 
 
 router = APIRouter(tags=["info"])
 
 
-def get_version_from_zmq(socket) -> str:
+async def get_version_from_zmq(socket) -> str:
     request = cbor2.dumps(['GET', 'api_version'])
     try:
-        return send_zmq_request(socket, request).decode()
+        return (await zmq_request(socket, request)).decode()
     except zmq.error.ZMQError as e:
         return "xxx"
 
 
-def get_mqbc_api_version() -> str:
-    return get_version_from_zmq(app_settings.ZMQ_MQBC_SOCKET)
+async def get_mqbc_api_version() -> str:
+    return await get_version_from_zmq(app_settings.ZMQ_MQBC_SOCKET)
 
 
-def get_m2eb_api_version() -> str:
-    return get_version_from_zmq(app_settings.ZMQ_M2EB_SOCKET)
+async def get_m2eb_api_version() -> str:
+    return await get_version_from_zmq(app_settings.ZMQ_M2EB_SOCKET)
 
 
 def get_serial_number() -> str:
@@ -60,8 +60,8 @@ def get_gnode_api_version():
 async def api_version_get():
     api_version = "{}.{}.{}".format(
         get_gnode_api_version(),
-        get_m2eb_api_version(),
-        get_mqbc_api_version()
+        await get_m2eb_api_version(),
+        await get_mqbc_api_version()
     )
 
     return {
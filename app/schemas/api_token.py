@@ -15,7 +15,7 @@
 # limitations under the License.
 
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 
 
@@ -23,3 +23,14 @@ class ApiTokenRequest(BaseModel):
     state: Optional[int]
     duration: Optional[int]
     description: Optional[str] = ""
+
+
+class ApiTokenResponse(BaseModel):
+    id: int
+    token_prefix: Optional[str]
+    state: Optional[int]
+    created: Optional[int]
+    till: Optional[int]
+    description: Optional[str] = ""
+
+    model_config = ConfigDict(from_attributes = True)
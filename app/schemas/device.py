@@ -29,19 +29,35 @@
 # EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class DeviceCreateRequest(BaseModel):
     type: str
     enabled: bool
     description: str
+    retention_max_age: int | None = Field(default=None, ge=0)
+    retention_max_frames: int | None = Field(default=None, ge=0)
+    retention_max_bytes: int | None = Field(default=None, ge=0)
+
+
+class DeviceBulkUpsertItem(DeviceCreateRequest):
+    id: str = Field(min_length=1)
+
+
+class DeviceBulkResult(BaseModel):
+    id: str | None
+    status: str  # created, updated, deleted, not_found or error
+    detail: str | None = None
 
 
 class DeviceUpdateRequest(BaseModel):
     type: str | None = None
     enabled: bool | None = None
     description: str | None = None
+    retention_max_age: int | None = Field(default=None, ge=0)
+    retention_max_frames: int | None = Field(default=None, ge=0)
+    retention_max_bytes: int | None = Field(default=None, ge=0)
 
 
 class DeviceListResponse(BaseModel):
@@ -56,3 +72,6 @@ class DeviceDetailsResponse(BaseModel):
     type: str
     enabled: bool
     description: str
+    retention_max_age: int | None = None
+    retention_max_frames: int | None = None
+    retention_max_bytes: int | None = None
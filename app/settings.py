@@ -15,6 +15,9 @@
 # limitations under the License.
 
 
+import os
+
+
 ALGORITHM = "ES256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 1440
 
@@ -23,7 +26,85 @@ TOKEN_AUTH_URL = "/api/auth/token"
 ZMQ_MQBC_SOCKET = "ipc:///tmp/mqbc-zmq.sock"
 ZMQ_M2EB_SOCKET = "ipc:///tmp/m2eb-zmq.sock"
 ZMQ_GCLIENT_SOCKET = "ipc:///run/gnode/gclient.sock"
+ZMQ_POOL_SIZE = 4  # DEALER sockets per endpoint
 
 MQBC_SERVICE_NAME = "mqbc.service"
 M2EB_SERVICE_NAME = "m2eb.service"
 GCLOUD_SERVICE_NAME = "gnode-cloud-client.service"
+
+# How status and network state are read: "auto" (D-Bus when reachable, else subprocesses),
+# "subprocess", or "dbus" (D-Bus only, startup fails if the system bus is unreachable)
+SYSTEM_BACKEND = os.getenv("GNODE_SYSTEM_BACKEND", "auto")
+DBUS_TIMEOUT = 2  # seconds
+
+NETWORK_PROBE_WORKERS = 4  # threads collecting network state concurrently
+NETWORK_PROBE_TIMEOUT = 10  # seconds, slower probes are left out of the response
+WIFI_SCAN_CACHE_TTL = int(os.getenv("GNODE_WIFI_SCAN_CACHE_TTL", 30))  # seconds
+
+SERVICE_STATUS_REFRESH_INTERVAL = 5  # seconds
+SERVICE_STATUS_MAX_AGE = 15  # seconds, readers refresh themselves past this age
+
+PREVIEW_DEFAULT_WIDTH = 300  # stored in device_data.preview
+PREVIEW_WIDTHS = (150, 300, 600)
+PREVIEW_WORKERS = 2  # processes resizing images
+
+HISTORY_STREAM_BATCH_SIZE = 16  # device_data rows fetched per round trip while streaming
+HISTORY_PAGE_DEFAULT_LIMIT = 100
+HISTORY_PAGE_MAX_LIMIT = 1000
+SENSOR_SERIES_MAX_POINTS = 10000
+
+SENSOR_EXTRACT_INTERVAL = 5  # seconds between scans for new device_data frames
+SENSOR_EXTRACT_BATCH_SIZE = 500  # frames per transaction
+SENSOR_ROLLUP_RESOLUTIONS = {"1m": 60, "1h": 3600, "1d": 86400}
+
+# With GNODE_FRAME_OFFLOAD=1, frame images are moved out of device_data into
+# content addressed files and served from there
+FRAME_OFFLOAD = os.getenv("GNODE_FRAME_OFFLOAD", "0") == "1"
+FRAME_STORAGE_DIR = os.getenv("GNODE_FRAME_STORAGE_DIR", "/gnode/storage/frames")
+FRAME_OFFLOAD_INTERVAL = 10  # seconds
+FRAME_OFFLOAD_BATCH_SIZE = 50
+
+LIST_DEFAULT_LIMIT = 1000  # rows per page when a list request has a cursor but no limit
+LIST_MAX_LIMIT = 1000
+
+DEVICE_BULK_MAX_ITEMS = 10000  # per bulk request, all committed in one transaction
+
+FRAME_FEED_POLL_INTERVAL = 1  # seconds between checks for new frames while clients are subscribed
+FRAME_FEED_BATCH_SIZE = 100
+FRAME_FEED_QUEUE_SIZE = 32  # events buffered per client
+FRAME_FEED_KEEPALIVE = 15  # seconds
+
+# Device data retention defaults, 0 disables a limit. Devices can override each one.
+RETENTION_MAX_AGE = int(os.getenv("GNODE_RETENTION_MAX_AGE", 0))  # seconds
+RETENTION_MAX_FRAMES = int(os.getenv("GNODE_RETENTION_MAX_FRAMES", 0))
+RETENTION_MAX_BYTES = int(os.getenv("GNODE_RETENTION_MAX_BYTES", 0))
+RETENTION_INTERVAL = 300  # seconds between retention runs
+RETENTION_BATCH_SIZE = 200  # frames deleted per transaction
+RETENTION_BATCH_PAUSE = 0.05  # seconds between transactions, lets writers in
+RETENTION_VACUUM_PAGES = 1000  # pages released per incremental vacuum step
+
+SETTINGS_CACHE_TTL = 2  # seconds between settings version checks
+
+API_TOKEN_CACHE_SIZE = 1024
+API_TOKEN_CACHE_TTL = 60  # seconds, bounds staleness across workers
+API_TOKEN_PREFIX_LENGTH = 6  # leading characters of a token kept in clear for display
+
+JWT_CACHE_SIZE = 1024
+JWT_CACHE_TTL = 300  # seconds, tokens expiring earlier are evicted at their exp
+
+USER_CACHE_SIZE = 256
+USER_CACHE_TTL = 60  # seconds, bounds staleness across workers
+
+# Connection pool of each database engine
+DB_POOL_SIZE = 5
+DB_POOL_MAX_OVERFLOW = 10
+DB_POOL_TIMEOUT = 30  # seconds to wait for a free connection
+DB_BUSY_TIMEOUT = 5000  # milliseconds SQLite waits for a locked database
+
+PASSWORD_WORKERS = 2  # threads hashing and verifying passwords
+PASSWORD_QUEUE_SIZE = 8  # waiting password checks, further logins get 503
+# bcrypt cost, 0 picks the highest cost verifying within PASSWORD_HASH_TARGET on this host
+PASSWORD_ROUNDS = int(os.getenv("GNODE_PASSWORD_ROUNDS", 0))
+PASSWORD_HASH_TARGET = float(os.getenv("GNODE_PASSWORD_HASH_TARGET", 0.25))  # seconds
+PASSWORD_MIN_ROUNDS = 10
+PASSWORD_MAX_ROUNDS = 14
@@ -0,0 +1,128 @@
+import time
+import datetime
+import pytest
+
+from jwt.exceptions import InvalidTokenError
+from fastapi import HTTPException
+
+from app import auth
+from app.cache import TTLCache
+from app.database_setup import SessionLocalDefault
+from app.models.api_token import ApiToken, hash_token
+import app.crud.users as user_crud
+import app.schemas.user as user_schema
+
+
+def test_ttl_cache_lru_eviction():
+    cache = TTLCache(2, 60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["hits"] == 3
+    assert cache.stats()["misses"] == 1
+
+
+def test_ttl_cache_expiration(mocker):
+    cache = TTLCache(2, 10)
+    now = time.monotonic()
+    mocker.patch("app.cache.time.monotonic", return_value=now)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=1)
+    mocker.patch("app.cache.time.monotonic", return_value=now + 5)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+
+
+def test_verify_api_token_cached(test_client, default_db_session, mocker):
+    auth.api_token_cache.clear()
+    default_db_session.add(ApiToken(token_hash=hash_token("cached"), state=1, created=0, till=0))
+    default_db_session.commit()
+
+    auth.verify_api_token("cached")
+    spy = mocker.patch.object(auth, "SessionLocalDefault", wraps=auth.SessionLocalDefault)
+    auth.verify_api_token("cached")
+    assert spy.call_count == 0
+
+    auth.api_token_cache.set(hash_token("cached"), (5, 0))
+    with pytest.raises(InvalidTokenError):
+        auth.verify_api_token("cached")
+
+    auth.api_token_cache.pop(hash_token("cached"))
+    auth.verify_api_token("cached")
+
+
+@pytest.mark.asyncio
+async def test_authenticate_caches_verified_jwt(test_client, default_db_session, mocker):
+    auth.jwt_cache.clear()
+    token = auth.create_access_token("ui", sub="test", expires_delta=datetime.timedelta(minutes=5))
+    spy = mocker.spy(auth, "decode_token")
+    assert (await auth.authenticate(token))["sub"] == "test"
+    assert (await auth.authenticate(token))["sub"] == "test"
+    assert spy.call_count == 1
+
+    # Revoking an API token takes effect for cached JWTs too
+    default_db_session.add(ApiToken(token_hash=hash_token("jti-1"), state=1, created=0, till=0))
+    default_db_session.commit()
+    token = auth.create_access_token("api", jti="jti-1")
+    await auth.authenticate(token)
+    api_token = (
+        default_db_session.query(ApiToken).filter(ApiToken.token_hash == hash_token("jti-1")).one()
+    )
+    api_token.state = 0
+    default_db_session.commit()
+    auth.api_token_cache.pop(hash_token("jti-1"))
+    with pytest.raises(HTTPException):
+        await auth.authenticate(token)
+    assert spy.call_count == 2
+
+
+def test_jwt_cache_bounded_by_exp(test_client, mocker):
+    auth.jwt_cache.clear()
+    mocker.patch("app.auth.Settings", return_value=mocker.Mock(api_authentication=True))
+    set_spy = mocker.spy(auth.jwt_cache, "set")
+    token = auth.create_access_token(
+        "ui", sub="test", expires_delta=datetime.timedelta(seconds=30)
+    )
+    test_client.get("/device/", headers={"Authorization": "Bearer " + token})
+    assert 0 < set_spy.call_args.kwargs["ttl"] <= 30
+
+
+def test_principal_cache_invalidation(test_client, default_db_session, mocker):
+    user_crud.principal_cache.clear()
+    user_crud.create_user(default_db_session, user_schema.UserCreate(
+        username="cached", password="secret", is_admin=False
+    ))
+    spy = mocker.spy(user_crud, "get_user_by_username")
+    assert user_crud.get_principal(default_db_session, "cached").is_active
+    assert user_crud.get_principal(default_db_session, "cached").is_active
+    assert spy.call_count == 1
+
+    db_user = user_crud.get_user_by_username(default_db_session, "cached")
+    db_user.is_active = False
+    default_db_session.commit()
+    assert not user_crud.get_principal(default_db_session, "cached").is_active
+
+    user_crud.delete_user(default_db_session, db_user.id)
+    assert user_crud.get_principal(default_db_session, "cached") is None
+
+
+def test_principal_cache_evicted_after_commit(test_client, default_db_session):
+    user_crud.principal_cache.clear()
+    user_crud.create_user(default_db_session, user_schema.UserCreate(
+        username="racing", password="secret", is_admin=False
+    ))
+    db_user = user_crud.get_user_by_username(default_db_session, "racing")
+    db_user.is_active = False
+    default_db_session.flush()
+    # Another session reads the committed row between flush and commit
+    other_session = SessionLocalDefault()
+    try:
+        assert user_crud.get_principal(other_session, "racing").is_active
+    finally:
+        other_session.close()
+    default_db_session.commit()
+    assert not user_crud.get_principal(default_db_session, "racing").is_active
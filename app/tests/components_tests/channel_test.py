@@ -0,0 +1,27 @@
+import json
+import pytest
+import zmq
+
+from app.components import status
+from app.components.channel import Channel
+
+
+@pytest.mark.asyncio
+async def test_channel_list_partial(mocker):
+    async def zmq_request(socket, request, timeout=200):
+        if socket == "mqbc":
+            raise zmq.Again()
+        return json.dumps([{"id": "h1"}]).encode()
+
+    mocker.patch("app.components.channel.app_settings.ZMQ_MQBC_SOCKET", "mqbc")
+    mocker.patch("app.components.channel.app_settings.ZMQ_M2EB_SOCKET", "m2eb")
+    mocker.patch("app.components.channel.zmq_request", side_effect=zmq_request)
+    mocker.patch.object(
+        status.service_registry, "status", return_value=status.ServiceStatus.RUNNING
+    )
+
+    channels, backends = await Channel().list()
+    assert [channel["id"] for channel in channels] == \
+        ["h1", "lora_basic_station_ws", "lora_basic_station_wss"]
+    assert channels[0]["type"] == "http"
+    assert backends == {"mqbc": "unavailable", "m2eb": "ok", "lora": "ok"}
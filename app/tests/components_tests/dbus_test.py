@@ -0,0 +1,157 @@
+import pytest
+
+from app.components import dbus, status, network_connections
+from app.components.dbus import DbusError, NetworkManagerClient, SystemdClient, NM
+
+
+class FakeBus:
+    # Serves canned properties and method replies instead of the system bus
+    def __init__(self, properties, methods):
+        self.properties = properties
+        self.methods = methods
+
+    def call(self, bus_name, path, interface, method, signature=None, body=()):
+        try:
+            return self.methods[(path, method)]
+        except KeyError:
+            raise DbusError("No such method")
+
+    def get_property(self, bus_name, path, interface, name):
+        return self.properties[(path, interface)][name]
+
+    def get_all(self, bus_name, path, interface):
+        return self.properties[(path, interface)]
+
+
+def variants(values):
+    return {key: ("v", value) for key, value in values.items()}
+
+
+@pytest.fixture
+def nm_bus():
+    root = "/org/freedesktop/NetworkManager"
+    return FakeBus(
+        properties={
+            (root, NM): {
+                "WirelessEnabled": True,
+                "NetworkingEnabled": False,
+                "ActiveConnections": ["/ac/1"],
+                "PrimaryConnection": "/ac/1",
+            },
+            ("/ac/1", NM + ".Connection.Active"): {
+                "Id": "Tele2_1c65c4",
+                "Type": "802-11-wireless",
+                "Devices": ["/dev/1"],
+                "Connection": "/settings/1",
+            },
+            ("/dev/1", NM + ".Device"): {
+                "Interface": "wlp0s20f3",
+                "DeviceType": 2,
+                "Ip4Config": "/ip4/1",
+            },
+            ("/ip4/1", NM + ".IP4Config"): {
+                "AddressData": [variants({"address": "192.168.0.18", "prefix": 24})],
+                "Gateway": "192.168.0.1",
+                "NameserverData": [variants({"address": "83.255.255.1"})],
+            },
+            ("/ap/1", NM + ".AccessPoint"): {
+                "Ssid": b"test",
+                "Strength": 90,
+                "MaxBitrate": 540000,
+                "Flags": 1,
+                "WpaFlags": 0,
+                "RsnFlags": 0x188,
+            },
+        },
+        methods={
+            (root, "GetDevices"): (["/dev/1"],),
+            (root, "GetDeviceByIpIface"): ("/dev/1",),
+            ("/dev/1", "GetAllAccessPoints"): (["/ap/1"],),
+            ("/settings/1", "GetSettings"): (
+                {
+                    "connection": variants({"id": "Tele2_1c65c4", "type": "802-11-wireless"}),
+                    "ipv4": variants({"method": "auto"}),
+                },
+            ),
+            (root + "/Settings", "ListConnections"): (["/settings/1"],),
+        },
+    )
+
+
+def test_network_manager_client(nm_bus):
+    client = NetworkManagerClient(nm_bus)
+    ipv4_settings = {
+        "address": "192.168.0.18",
+        "netmask": "255.255.255.0",
+        "gateway": "192.168.0.1",
+        "dns": "83.255.255.1"
+    }
+    assert client.wifi_state() == "enabled"
+    assert client.networking_state() == "disabled"
+    assert client.available_wifi() == [{
+        "ssid": "test",
+        "security": "WPA2",
+        "device": "wlp0s20f3",
+        "signal": "90",
+        "rate": "540 Mbit/s"
+    }]
+    assert client.available_ethernet() == []
+    assert client.active_connections(["ethernet", "wifi"]) == [{
+        "name": "Tele2_1c65c4",
+        "type": "wifi",
+        "device": "wlp0s20f3",
+        "ipv4_method": "auto",
+        "ipv4_settings": ipv4_settings
+    }]
+    assert client.active_connections(["ethernet"]) == []
+    assert client.default_device() == "wlp0s20f3"
+    assert client.ipv4_settings("wlp0s20f3") == ipv4_settings
+
+
+def test_dbus_status_backend():
+    bus = FakeBus(
+        properties={
+            ("/unit/mqbc", dbus.SYSTEMD + ".Unit"):
+                {"LoadState": "loaded", "ActiveState": "active", "SubState": "running"},
+            ("/unit/none", dbus.SYSTEMD + ".Unit"):
+                {"LoadState": "not-found", "ActiveState": "inactive", "SubState": "dead"},
+        },
+        methods={}
+    )
+    units = {"mqbc.service": "/unit/mqbc", "none.service": "/unit/none"}
+    bus.call = lambda bus_name, path, interface, method, signature=None, body=(): (units[body[0]],)
+    backend = status.DbusStatusBackend(SystemdClient(bus))
+    assert backend.services_status(["mqbc.service", "none"]) == {
+        "mqbc.service": status.ServiceStatus.RUNNING,
+        "none": status.ServiceStatus.MALFORMED
+    }
+
+
+def test_dbus_backends_fall_back_to_subprocess(mocker):
+    broken_bus = FakeBus({}, {})
+    broken_bus.get_property = broken_bus.call
+    broken_bus.get_all = broken_bus.call
+
+    mocker.patch("app.components.network_connections.get_wifi_state", return_value="enabled")
+    backend = network_connections.DbusNetworkBackend(NetworkManagerClient(broken_bus))
+    assert backend.wifi_state() == "enabled"
+
+    mocker.patch("app.components.status.get_services_status",
+        return_value={"a": status.ServiceStatus.STOPPED})
+    backend = status.DbusStatusBackend(SystemdClient(broken_bus))
+    assert backend.services_status(["a"]) == {"a": status.ServiceStatus.STOPPED}
+
+
+def test_dbus_backend_required(mocker):
+    mocker.patch("app.settings.SYSTEM_BACKEND", "dbus")
+    mocker.patch.object(dbus.BusCache, "probed", False)
+    mocker.patch.object(dbus.BusCache, "bus", None)
+    mocker.patch("app.components.dbus.connect_system_bus", return_value=None)
+    with pytest.raises(DbusError):
+        dbus.get_system_bus()
+
+    broken_bus = FakeBus({}, {})
+    broken_bus.get_property = broken_bus.call
+    backend = network_connections.DbusNetworkBackend(NetworkManagerClient(broken_bus))
+    with pytest.raises(DbusError):
+        backend.wifi_state()
@@ -0,0 +1,62 @@
+import io
+
+import pytest
+from PIL import Image
+
+from app.components import frame_feed
+from app.components.frame_feed import FrameFeed
+from app.models.device import DeviceData
+
+
+@pytest.mark.asyncio
+async def test_frame_feed_fan_out(test_client, default_db_session, mocker):
+    buffer = io.BytesIO()
+    Image.new("RGB", (600, 400)).save(buffer, format="JPEG")
+    default_db_session.add(DeviceData(device_id="cam", blob=buffer.getvalue()))
+    default_db_session.commit()
+    mocker.patch("app.settings.FRAME_FEED_QUEUE_SIZE", 2)
+    get_preview = mocker.spy(frame_feed.preview_component, "get_preview")
+
+    feed = FrameFeed()
+    plain = feed.subscribe("cam")
+    with_preview = feed.subscribe("cam", preview=True)
+    feed.subscribe("cam", preview=True)
+    other = feed.subscribe("other")
+    await feed.poll()
+    assert plain.queue.empty()
+
+    for i in range(3):
+        default_db_session.add(
+            DeviceData(device_id="cam", blob=buffer.getvalue(), sensor_data='{"t": %d}' % i)
+        )
+    default_db_session.add(DeviceData(device_id="gate"))
+    default_db_session.commit()
+    await feed.poll()
+
+    events = [plain.queue.get_nowait() for _ in range(plain.queue.qsize())]
+    assert [event["frame_id"] for event in events] == [3, 4]
+    assert events[0]["sensor_data"] == {"t": 1}
+    assert "preview" not in events[0]
+    assert with_preview.queue.get_nowait()["preview"]
+    assert other.queue.empty()
+    assert feed.cursor == 5
+    assert get_preview.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_frame_feed_corrupt_frame(test_client, default_db_session, mocker):
+    buffer = io.BytesIO()
+    Image.new("RGB", (600, 400)).save(buffer, format="JPEG")
+    feed = FrameFeed()
+    subscriber = feed.subscribe("cam", preview=True)
+    await feed.poll()
+
+    default_db_session.add(DeviceData(device_id="cam", blob=b"not an image"))
+    default_db_session.add(DeviceData(device_id="cam", blob=buffer.getvalue()))
+    default_db_session.commit()
+    await feed.poll()
+
+    events = [subscriber.queue.get_nowait() for _ in range(subscriber.queue.qsize())]
+    assert len(events) == 2
+    assert events[0]["preview"] is None
+    assert events[1]["preview"]
@@ -0,0 +1,80 @@
+import os
+import fcntl
+import threading
+
+from sqlalchemy.orm import undefer
+
+from app.components import frame_store
+from app.models.device import DeviceData
+
+
+def test_offload_and_release(test_client, default_db_session, mocker, tmp_path):
+    mocker.patch("app.settings.FRAME_STORAGE_DIR", str(tmp_path))
+    for blob in (b"same", b"same", b"other"):
+        default_db_session.add(DeviceData(device_id="cam", blob=blob))
+    default_db_session.add(DeviceData(device_id="cam"))
+    default_db_session.commit()
+
+    assert frame_store.offload_batch(2)[0] == 2
+    frame_store.offload_pending()
+    assert frame_store.offload_batch(10) == (0, 0)
+    default_db_session.expire_all()
+    rows = (
+        default_db_session.query(DeviceData)
+        .options(undefer(DeviceData.blob))
+        .order_by(DeviceData.id)
+        .all()
+    )
+    assert [row.blob for row in rows] == [None] * 4
+    assert rows[0].blob_ref == rows[1].blob_ref != rows[2].blob_ref
+    assert [frame_store.read_frame(row) for row in rows] == [b"same", b"same", b"other", None]
+    assert rows[2].blob_size == 5
+
+    default_db_session.delete(rows[0])
+    default_db_session.delete(rows[2])
+    default_db_session.commit()
+    frame_store.release_frames(default_db_session, [rows[0].blob_ref, rows[2].blob_ref])
+    assert os.path.exists(frame_store.frame_path(rows[1].blob_ref))
+    assert not os.path.exists(frame_store.frame_path(rows[2].blob_ref))
+
+
+def test_offload_row_deleted_meanwhile(test_client, default_db_session, mocker, tmp_path):
+    mocker.patch("app.settings.FRAME_STORAGE_DIR", str(tmp_path))
+    default_db_session.add(DeviceData(device_id="cam", blob=b"gone"))
+    default_db_session.commit()
+    write_frame = frame_store.write_frame
+
+    def delete_and_write(blob):
+        default_db_session.query(DeviceData).delete()
+        default_db_session.commit()
+        return write_frame(blob)
+
+    mocker.patch.object(frame_store, "write_frame", side_effect=delete_and_write)
+    assert frame_store.offload_batch(10)[0] == 1
+    assert default_db_session.query(DeviceData).count() == 0
+    assert [name for _, _, files in os.walk(tmp_path) for name in files] == [".lock"]
+
+
+def test_storage_lock_shared_between_processes(test_client, default_db_session, mocker, tmp_path):
+    mocker.patch("app.settings.FRAME_STORAGE_DIR", str(tmp_path))
+    default_db_session.add(DeviceData(device_id="cam", blob=b"frame"))
+    default_db_session.commit()
+    frame_store.offload_pending()
+    row = default_db_session.query(DeviceData).one()
+    blob_ref = row.blob_ref
+    default_db_session.delete(row)
+    default_db_session.commit()
+
+    # Another worker process holds the lock, flock conflicts across open files
+    with open(os.path.join(tmp_path, ".lock"), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        release = threading.Thread(
+            target=frame_store.release_frames, args=(default_db_session, [blob_ref])
+        )
+        release.start()
+        release.join(0.2)
+        assert release.is_alive()
+        assert os.path.exists(frame_store.frame_path(blob_ref))
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+    release.join(5)
+    assert not os.path.exists(frame_store.frame_path(blob_ref))
@@ -507,7 +507,7 @@ def test_connect_wifi_already_connected(mocker):
     network_connections.connect_wifi("test","test")
     network_connections.connect_wifi("test",None)
     assert mock_fn.call_count == 0
-      
+
 def test_connect_wifi_run_error(mocker):
     mock_available_wifi = [{
         "ssid" : "test",
@@ -589,7 +589,6 @@ def test_connect_wifi_multiple_cases(mocker,ssid, password, sel_conn, active_con
         assert e.status_code == err_code
 
 
-    
 @pytest.mark.parametrize("nw_settings,set_wifi_call_count, set_wifi_args", [
 ({
     "type" : "wifi",
@@ -670,4 +669,35 @@ def test_set_network_settings_ipv4_settings(mocker, nw_settings, is_err, err_cod
         assert mock_set_ipv4.call_args == set_ipv4_args
     except HTTPException as e:
         assert is_err
-        assert e.status_code == err_code
\ No newline at end of file
+        assert e.status_code == err_code
+
+def test_get_netwok_settings_partial_and_cached_scan(mocker):
+    network_connections.invalidate_wifi_scan()
+    mocker.patch("app.components.network_connections.get_network_backend",
+        return_value=network_connections.SubprocessNetworkBackend())
+    mocker.patch("app.components.network_connections.get_ap_state", return_value="disabled")
+    mocker.patch("app.components.network_connections.get_wifi_state", return_value="enabled")
+    mocker.patch("app.components.network_connections.get_ethernet_state", return_value="enabled")
+    mock_scan = mocker.patch(
+        "app.components.network_connections.get_available_wifi", return_value=[]
+    )
+    mocker.patch("app.components.network_connections.get_available_ethernet", return_value=[])
+    mocker.patch("app.components.network_connections.get_current_active_connections",
+        side_effect=subprocess.CalledProcessError(returncode=1, cmd="", stderr="invalid!"))
+
+    resp = network_connections.get_netwok_settings()
+    assert resp == {
+        "ap_state": "disabled",
+        "wifi_state": "enabled",
+        "ethernet_state": "enabled",
+        "available_wifi": [],
+        "available_ethernet": [],
+        "fetching_status": "failure"
+    }
+    network_connections.get_netwok_settings()
+    assert mock_scan.call_count == 1
+
+    mocker.patch("app.components.network_connections.run_privileged_command", return_value="")
+    network_connections.set_wifi_state(True)
+    network_connections.get_netwok_settings()
+    assert mock_scan.call_count == 2
@@ -0,0 +1,55 @@
+import datetime
+
+from app.components import retention
+from app.database_setup import DefaultBase, make_engine
+from app.models.device import Device, DeviceData, DevicePreview
+from app.models.sensor import SensorReading
+
+
+def test_apply_retention(test_client, default_db_session, mocker):
+    now = datetime.datetime.utcnow()
+    default_db_session.add(
+        Device(id="frames", type="cam", enabled=True, description="", retention_max_frames=3)
+    )
+    default_db_session.add(
+        Device(id="bytes", type="cam", enabled=True, description="", retention_max_bytes=2500)
+    )
+    for i in range(6):
+        default_db_session.add(
+            DeviceData(id=i + 1, device_id="frames", created=now, blob=b"x" * 100_000)
+        )
+        default_db_session.add(
+            DeviceData(id=i + 11, device_id="bytes", created=now, blob=b"x" * 1000)
+        )
+        default_db_session.add(
+            DeviceData(id=i + 21, device_id="aged", created=now - datetime.timedelta(hours=i))
+        )
+    default_db_session.add(DevicePreview(device_data_id=1, width=150, blob=b"x"))
+    default_db_session.add(
+        SensorReading(device_data_id=1, device_id="frames", metric="t", ts=0, value=1)
+    )
+    default_db_session.commit()
+    mocker.patch("app.settings.RETENTION_MAX_AGE", 3 * 3600 - 60)
+    mocker.patch("app.settings.RETENTION_BATCH_SIZE", 2)
+    mocker.patch("app.settings.RETENTION_BATCH_PAUSE", 0)
+    before = retention.RetentionStats.stats()
+
+    retention.apply_retention()
+
+    ids = [row.id for row in default_db_session.query(DeviceData.id).order_by(DeviceData.id)]
+    assert ids == [4, 5, 6, 15, 16, 21, 22, 23]
+    assert default_db_session.query(DevicePreview).count() == 0
+    assert default_db_session.query(SensorReading).count() == 0
+    stats = retention.RetentionStats.stats()
+    assert stats["frames_deleted"] - before["frames_deleted"] == 10
+    assert stats["bytes_deleted"] - before["bytes_deleted"] == 3 * 100_000 + 4 * 1000
+    assert stats["bytes_vacuumed"] > before["bytes_vacuumed"]
+
+
+def test_new_database_uses_incremental_vacuum(tmp_path):
+    engine = make_engine("sqlite:///{}".format(tmp_path / "new.db"))
+    DefaultBase.metadata.create_all(bind=engine)
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+    engine.dispose()
@@ -0,0 +1,48 @@
+import datetime
+
+from app.components import sensor_store
+from app.models.device import DeviceData
+from app.models.sensor import SensorReading, SensorRollup
+
+
+def test_numeric_values():
+    sensor_data = sensor_store.parse_sensor_data(
+        '{"t": 1, "on": true, "env": {"hum": 2.5}, "s": "x"}'
+    )
+    assert list(sensor_store.numeric_values(sensor_data)) == [("t", 1.0), ("env.hum", 2.5)]
+    assert sensor_store.parse_sensor_data(b"[1]") == {}
+    assert sensor_store.parse_sensor_data("{") == {}
+
+
+def test_extract_and_aggregate(test_client, default_db_session):
+    start = datetime.datetime(2025, 1, 1)
+    for i in range(5):
+        default_db_session.add(
+            DeviceData(
+                device_id="cam",
+                created=start + datetime.timedelta(seconds=30 * i),
+                sensor_data='{"temp": %d}' % i,
+            )
+        )
+    default_db_session.add(DeviceData(device_id="cam", created=None, sensor_data='{"temp": 9}'))
+    default_db_session.commit()
+
+    assert sensor_store.extract_batch(4) == 4
+    assert sensor_store.extract_batch(4) == 2
+    assert sensor_store.extract_batch(4) == 0
+    assert default_db_session.query(SensorReading).count() == 5
+    assert (
+        default_db_session.query(SensorRollup).filter(SensorRollup.resolution == 60).count() == 3
+    )
+
+    epoch = sensor_store.to_timestamp(start)
+    expected = [(epoch, 2, 0, 1, 0.5), (epoch + 60, 2, 2, 3, 2.5), (epoch + 120, 1, 4, 4, 4)]
+    assert [
+        tuple(row) for row in sensor_store.aggregate(default_db_session, "cam", "temp", 60)
+    ] == expected
+    assert [
+        tuple(row) for row in sensor_store.aggregate(default_db_session, "cam", "temp", 120)
+    ] == [(epoch, 4, 0, 3, 1.5), (epoch + 120, 1, 4, 4, 4)]
+    assert [
+        tuple(row) for row in sensor_store.aggregate(default_db_session, "cam", "temp", 3600)
+    ] == [(epoch, 5, 0, 4, 2)]
@@ -1,6 +1,8 @@
+import time
 import pytest
 import subprocess
 
+from app.components import settings as settings_component
 from app.components.settings import Settings
 from app.models.settings import SettingsModel
 from app import utils
@@ -38,3 +40,19 @@ def test_settings_setters(auth, mocker, test_client,default_db_session, gcloud):
     assert settings_model.gcloud == gcloud
 
 
+def test_settings_snapshot_cached(test_client, default_db_session, mocker):
+    Settings()
+    spy = mocker.patch.object(
+        settings_component, "SessionLocalDefault", wraps=settings_component.SessionLocalDefault
+    )
+    assert Settings().api_authentication == True
+    assert spy.call_count == 0
+
+    # A change made by another worker is picked up once the version moves
+    settings_model = default_db_session.query(SettingsModel).first()
+    settings_model.api_authentication = False
+    settings_model.version = (settings_model.version or 0) + 1
+    default_db_session.commit()
+    mocker.patch("app.components.settings.time.monotonic", return_value=time.monotonic() + 60)
+    assert Settings().api_authentication == False
+    assert spy.call_count == 1
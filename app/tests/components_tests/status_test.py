@@ -58,3 +58,42 @@ def test_get_service_status(mocker, mode):
     else:
         assert systemd_spy.call_count == 0
         assert supervisor_spy.call_count == 1
+
+def test_get_systemd_services_status_batched(mocker):
+    mock_fn = mocker.patch("app.components.status.run_command", return_value = \
+        "LoadState=loaded\nActiveState=active\nSubState=running\n\n" + \
+        "LoadState=not-found\nActiveState=inactive\nSubState=dead\n\n" + \
+        "LoadState=loaded\nActiveState=failed\nSubState=failed")
+    res = status.get_systemd_services_status(["a", "b", "c"])
+    assert res == {
+        "a": status.ServiceStatus.RUNNING,
+        "b": status.ServiceStatus.MALFORMED,
+        "c": status.ServiceStatus.FAILED
+    }
+    assert mock_fn.call_count == 1
+    assert mock_fn.call_args.args[0][:5] == ['systemctl', 'show', 'a', 'b', 'c']
+
+def test_service_status_registry(mocker):
+    backend = mocker.Mock()
+    mock_fn = backend.services_status
+    mock_fn.side_effect = lambda names: {name: status.ServiceStatus.RUNNING for name in names}
+    mocker.patch("app.components.status.get_status_backend", return_value=backend)
+    registry = status.ServiceStatusRegistry(["a", "b"], max_age=60)
+    registry.refresh()
+    assert mock_fn.call_args.args == (["a", "b"],)
+
+    # Cached entries do not touch the system
+    res, age = registry.get("a")
+    assert res == status.ServiceStatus.RUNNING
+    assert age >= 0
+    assert mock_fn.call_count == 1
+
+    # Unknown services are fetched on demand and refreshed from then on
+    registry.status("c")
+    assert mock_fn.call_args.args == (["c"],)
+    registry.refresh()
+    assert mock_fn.call_args.args == (["a", "b", "c"],)
+
+    # Stale entries are refreshed
+    registry.status("a", max_age=-1)
+    assert mock_fn.call_count == 4
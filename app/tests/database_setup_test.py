@@ -0,0 +1,28 @@
+from sqlalchemy import text
+
+import app.settings as app_settings
+from app.main import app
+from app.auth import authenticate
+from app.database_setup import default_engine, pool_stats
+
+
+def test_sqlite_pragmas(test_client):
+    with default_engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert (
+            connection.execute(text("PRAGMA busy_timeout")).scalar()
+            == app_settings.DB_BUSY_TIMEOUT
+        )
+
+
+def test_sessions_released_on_errors(test_client):
+    app.dependency_overrides[authenticate] = lambda: None
+    try:
+        checked_out = pool_stats(default_engine)["checked_out"]
+        for path in ["/device/missing", "/converter/missing", "/ca/missing", "/auth/apitoken/1"]:
+            assert test_client.get(path).status_code == 404
+        assert pool_stats(default_engine)["checked_out"] == checked_out
+        metrics = test_client.get("/status/metrics").json()
+        assert metrics["db_pool"]["default"]["size"] == app_settings.DB_POOL_SIZE
+    finally:
+        app.dependency_overrides.pop(authenticate)
@@ -0,0 +1,75 @@
+from sqlalchemy import create_engine, inspect, text
+
+from app.database_setup import DefaultBase, make_engine
+from app.migrations import add_missing_columns, add_missing_indexes, hash_api_tokens
+from app.migrations import enable_incremental_vacuum
+from app.models.api_token import hash_token
+
+import app.models.device
+
+
+def test_migrate_device_data_indexes():
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.execute(
+            text("CREATE TABLE device_data (id INTEGER PRIMARY KEY, device_id VARCHAR)")
+        )
+
+    add_missing_columns(engine, DefaultBase)
+    add_missing_indexes(engine, DefaultBase)
+    add_missing_indexes(engine, DefaultBase)
+
+    indexes = {index["name"] for index in inspect(engine).get_indexes("device_data")}
+    assert {
+        "ix_device_data_device_id_id",
+        "ix_device_data_device_id_created",
+        "ix_device_data_blob_ref",
+    } <= indexes
+    with engine.connect() as connection:
+        plan = connection.execute(text(
+            "EXPLAIN QUERY PLAN SELECT max(id) FROM device_data WHERE device_id = 'cam'"
+        )).all()
+        assert "ix_device_data_device_id_id" in str(plan)
+        plan = connection.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM device_data WHERE device_id = 'cam' AND created > 0"
+        )).all()
+        assert "ix_device_data_device_id_created" in str(plan)
+
+
+def test_migrate_plaintext_api_tokens():
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE api_tokens (id INTEGER PRIMARY KEY, token VARCHAR, state INTEGER, "
+            "created INTEGER, till INTEGER, description VARCHAR)"
+        ))
+        connection.execute(text("INSERT INTO api_tokens (token, state) VALUES ('abcdefghij', 1)"))
+
+    add_missing_columns(engine, DefaultBase)
+    hash_api_tokens(engine)
+    hash_api_tokens(engine)
+    add_missing_indexes(engine, DefaultBase)
+
+    with engine.connect() as connection:
+        row = connection.execute(
+            text("SELECT token, token_hash, token_prefix FROM api_tokens")
+        ).one()
+        assert row == (None, hash_token("abcdefghij"), "abcdef")
+        plan = connection.execute(text(
+            "EXPLAIN QUERY PLAN SELECT state FROM api_tokens WHERE token_hash = 'x'"
+        )).all()
+        assert "ix_api_tokens_token_hash" in str(plan)
+
+
+def test_migrate_to_incremental_vacuum(tmp_path):
+    path = tmp_path / "old.db"
+    engine = create_engine("sqlite:///{}".format(path))
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE t (id INTEGER PRIMARY KEY)")
+    engine.dispose()
+
+    engine = make_engine("sqlite:///{}".format(path))
+    enable_incremental_vacuum(engine)
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2
+    engine.dispose()
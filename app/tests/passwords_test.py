@@ -0,0 +1,111 @@
+import os
+import asyncio
+import threading
+
+import pytest
+from passlib.hash import bcrypt
+
+from app import settings
+from app.main import app
+import app.crud.users as user_crud
+import app.routers.authentication as authentication
+from app.passwords import (
+    PasswordPool,
+    PasswordPoolBusy,
+    PasswordStats,
+    PasswordPolicy,
+    pwd_context,
+)
+from app.passwords import hash_password, calibrate_rounds
+
+
+@pytest.mark.asyncio
+async def test_password_pool_limits(mocker):
+    hashed = hash_password("secret")
+    assert await PasswordPool.run(pwd_context.verify, "secret", hashed)
+    calls = PasswordStats.stats()["calls"]
+
+    mocker.patch.object(
+        PasswordPool, "pending", settings.PASSWORD_WORKERS + settings.PASSWORD_QUEUE_SIZE
+    )
+    with pytest.raises(PasswordPoolBusy):
+        await PasswordPool.run(pwd_context.verify, "secret", hashed)
+    stats = PasswordStats.stats()
+    assert stats["calls"] == calls
+    assert stats["rejected"] >= 1
+
+
+def test_login_busy(test_client, mocker):
+    mocker.patch.object(
+        PasswordPool, "pending", settings.PASSWORD_WORKERS + settings.PASSWORD_QUEUE_SIZE
+    )
+    response = test_client.post(
+        settings.TOKEN_AUTH_URL,
+        data={
+            "username": os.getenv("GNODE_DEFAULT_USERNAME"),
+            "password": os.getenv("GNODE_DEFAULT_PASSWORD"),
+        },
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_calibrate_rounds(mocker):
+    mocker.patch("app.passwords.measure_rounds", return_value=0.05)
+    assert calibrate_rounds(0.25) == settings.PASSWORD_MIN_ROUNDS + 2
+    assert calibrate_rounds(0.01) == settings.PASSWORD_MIN_ROUNDS
+    assert calibrate_rounds(100) == settings.PASSWORD_MAX_ROUNDS
+
+
+def test_rehash_on_login(test_client, default_db_session):
+    username = os.getenv("GNODE_DEFAULT_USERNAME")
+    password = os.getenv("GNODE_DEFAULT_PASSWORD")
+    user = user_crud.get_user_by_username(default_db_session, username)
+    user.hashed_password = bcrypt.using(rounds=4).hash(password)
+    default_db_session.commit()
+
+    assert authentication.authenticate_user(default_db_session, username, password)
+    default_db_session.refresh(user)
+    assert bcrypt.from_string(user.hashed_password).rounds == PasswordPolicy.rounds
+    assert authentication.authenticate_user(default_db_session, username, password)
+
+
+def test_create_user_busy(test_client, mocker):
+    app.dependency_overrides[authentication.get_current_active_user] = lambda: mocker.Mock(
+        is_admin=True
+    )
+    mocker.patch.object(
+        PasswordPool, "pending", settings.PASSWORD_WORKERS + settings.PASSWORD_QUEUE_SIZE
+    )
+    try:
+        response = test_client.post(
+            "/user/", json={"username": "busy", "password": "secret", "is_admin": False}
+        )
+    finally:
+        app.dependency_overrides.pop(authentication.get_current_active_user)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_password_pool_slot_held_until_job_ends():
+    started = threading.Event()
+    finish = threading.Event()
+
+    def job():
+        started.set()
+        finish.wait(5)
+
+    task = asyncio.create_task(PasswordPool.run(job))
+    await asyncio.to_thread(started.wait, 5)
+    pending = PasswordPool.pending
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert PasswordPool.pending == pending
+    finish.set()
+    for _ in range(100):
+        if PasswordPool.pending == pending - 1:
+            break
+        await asyncio.sleep(0.01)
+    assert PasswordPool.pending == pending - 1
@@ -1,3 +1,4 @@
+import uuid
 import pytest
 from sqlalchemy import exc
 import os
@@ -13,6 +14,9 @@ from app.models.settings import SettingsModel
 from app.components.settings import Settings
 import app.routers.authentication as authentication
 import app.schemas.user as user_schema
+from app.main import app
+from app.auth import authenticate, verify_api_token
+from app.models.api_token import ApiToken
 
 from app.tests.utils import is_valid_jwt_token
 
@@ -73,7 +77,7 @@ def test_get_token_url_without_authentication(test_client, default_db_session):
 
 
 # Currently testing functions that use Depends tag by directly providing
-# the parameters instead of using the Dependentant function. 
+# the parameters instead of using the Dependentant function.
 # The actual testing of Depends functionality will happen when
 # we test the actual API route that calls this function
 
@@ -93,7 +97,7 @@ def test_get_token_url_without_authentication(test_client, default_db_session):
 #     except HTTPException as e:
 #         assert e.status_code == 401
 #         assert e.detail == "Token is not valid"
-    
+
 #     #random jwt token generated from another key
 #     token = "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.eyJzdWIiOiJ0ZXN0IiwiZXhwIjo" + \
 #     "iMjAyNC0xMS0xNCAxNzoyNzowNi41ODgxMDErMDA6MDAifQ.ql5Xm7ZgnfkaJpaHkKFIe0MoF6L8rRLU1_2hxj7h9P0"
@@ -183,7 +187,7 @@ async def test_get_current_user_failure(test_client, default_db_session ):
 #         assert True
 
 #     test_file_path = "./app/tests/resources/test.pem"
-    
+
 #     # test invalid key file
 #     with open(test_file_path, "w") as file:
 #         file.write("Test file.\n")
@@ -197,12 +201,12 @@ async def test_get_current_user_failure(test_client, default_db_session ):
 
 #     os.environ['GNODE_PRIVATE_KEY_PATH'] = old_private_key_path
 
-    
+
 # def test_load_private_key_from_file_success():
 #     old_private_key_path = os.getenv("GNODE_PRIVATE_KEY_PATH")
 
 #     test_file_path = "./app/tests/resources/test_private_key.pem"
-    
+
 #     private_key = ec.generate_private_key(ec.SECP256R1())
 #     private_key_pem = private_key.private_bytes(
 #         encoding=serialization.Encoding.PEM,
@@ -212,7 +216,7 @@ async def test_get_current_user_failure(test_client, default_db_session ):
 
 #     with open(test_file_path, "wb") as pem_file:
 #         pem_file.write(private_key_pem)
-   
+
 #     os.environ['GNODE_PRIVATE_KEY_PATH'] = test_file_path
 #     read_key = authentication.load_private_key_from_file()
 #     read_key_pem = read_key.private_bytes(
@@ -224,7 +228,7 @@ async def test_get_current_user_failure(test_client, default_db_session ):
 #     os.remove(test_file_path)
 #     os.environ['GNODE_PRIVATE_KEY_PATH'] = old_private_key_path
 
-    
+
 # def test_load_public_key_from_file_failure():
 #     old_public_key_path = os.getenv("GNODE_PUBLIC_KEY_PATH")
 
@@ -245,7 +249,7 @@ async def test_get_current_user_failure(test_client, default_db_session ):
 #         assert True
 
 #     test_file_path = "./app/tests/resources/test.pem"
-    
+
 #     # test invalid key file
 #     with open(test_file_path, "w") as file:
 #         file.write("Test file.\n")
@@ -259,12 +263,12 @@ async def test_get_current_user_failure(test_client, default_db_session ):
 
 #     os.environ['GNODE_PUBLIC_KEY_PATH'] = old_public_key_path
 
-    
+
 # def test_load_public_key_from_file_success():
 #     old_public_key_path = os.getenv("GNODE_PUBLIC_KEY_PATH")
 
 #     test_file_path = "./app/tests/resources/test_public_key.pem"
-    
+
 #     private_key = ec.generate_private_key(ec.SECP256R1())
 #     public_key = private_key.public_key()
 #     public_key_pem = public_key.public_bytes(
@@ -274,7 +278,7 @@ async def test_get_current_user_failure(test_client, default_db_session ):
 
 #     with open(test_file_path, "wb") as pem_file:
 #         pem_file.write(public_key_pem)
-   
+
 #     os.environ['GNODE_PUBLIC_KEY_PATH'] = test_file_path
 #     read_key = authentication.load_public_key_from_file()
 #     read_key_pem = read_key.public_bytes(
@@ -288,7 +292,7 @@ async def test_get_current_user_failure(test_client, default_db_session ):
 def test_authenticate_user(test_client, default_db_session):
     default_username = os.getenv("GNODE_DEFAULT_USERNAME")
     default_password = os.getenv("GNODE_DEFAULT_PASSWORD")
-    
+
     # Correct data
     result = authentication.authenticate_user(
         default_db_session,
@@ -320,4 +324,43 @@ def test_authenticate_user(test_client, default_db_session):
 #     }
 #     token = authentication.create_access_token(payload)
 #     decoded_payload = jwt.decode(token, options={"verify_signature": False})
-#     assert all(key in decoded_payload and decoded_payload[key] == value for key, value in payload.items())
\ No newline at end of file
+#     assert all(key in decoded_payload and decoded_payload[key] == value for key, value in payload.items())
+
+def test_api_token_shown_once(test_client):
+    app.dependency_overrides[authenticate] = lambda: None
+    try:
+        response = test_client.post(
+            "/auth/apitoken", json={"state": None, "duration": 0, "description": "ci"}
+        )
+        assert response.status_code == 200
+        token = response.json()["token"]
+        details = test_client.get(
+            "/auth/apitoken/{}".format(response.json()["apitoken_id"])
+        ).json()
+    finally:
+        app.dependency_overrides.pop(authenticate)
+    assert details["token_prefix"] == token[:settings.API_TOKEN_PREFIX_LENGTH]
+    assert details["state"] == 1
+    assert "token" not in details
+    verify_api_token(token)
+
+
+def test_api_token_list_null_sort_values(test_client, default_db_session):
+    for created in [None, 5, None, 3, None]:
+        default_db_session.add(
+            ApiToken(token_hash=uuid.uuid4().hex, state=1, created=created, till=0)
+        )
+    default_db_session.commit()
+    app.dependency_overrides[authenticate] = lambda: None
+    try:
+        ids = []
+        params = {"sort": "created", "limit": 2}
+        while True:
+            response = test_client.get("/auth/apitoken/", params=params)
+            ids += [token["id"] for token in response.json()]
+            if "X-Next-Cursor" not in response.headers:
+                break
+            params["cursor"] = response.headers["X-Next-Cursor"]
+    finally:
+        app.dependency_overrides.pop(authenticate)
+    assert ids == [1, 3, 5, 4, 2]
@@ -0,0 +1,299 @@
+import io
+import datetime
+
+import cbor2
+import pytest
+from PIL import Image
+
+from app.main import app
+from app.auth import authenticate
+from app.models.device import Device, DeviceData, DevicePreview
+from app.components.preview import PreviewStats
+from app.components import sensor_store, frame_store
+
+
+@pytest.fixture
+def device_client(test_client):
+    app.dependency_overrides[authenticate] = lambda: None
+    yield test_client
+    app.dependency_overrides.pop(authenticate)
+
+
+def jpeg(width, height):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def test_history_data_stream(device_client, default_db_session, mocker):
+    created = datetime.datetime(2025, 1, 1)
+    for i in range(5):
+        default_db_session.add(DeviceData(device_id="cam", created=created,
+            blob=jpeg(600, 400), sensor_data='{"t": %d}' % i))
+    default_db_session.commit()
+    mocker.patch("app.settings.HISTORY_STREAM_BATCH_SIZE", 2)
+
+    response = device_client.get("/device/cam/history-data/1-3")
+    assert response.status_code == 200
+    assert response.content[:1] == b"\x9f" and response.content[-1:] == b"\xff"
+    frames = cbor2.loads(response.content)
+    assert [frame["frame_id"] for frame in frames] == [4, 3, 2]
+    assert [frame["sensor_data"] for frame in frames] == ['{"t": 3}', '{"t": 2}', '{"t": 1}']
+
+    response = device_client.get("/device/cam/history-data/0-1?preview=true")
+    frame = cbor2.loads(response.content)[0]
+    assert Image.open(io.BytesIO(frame["data_frame"])).width == 300
+
+    assert device_client.get("/device/cam/history-data/5-1").status_code == 404
+    assert device_client.get("/device/none/history-data/0-1").status_code == 404
+
+
+def test_previews_generated_once(device_client, default_db_session):
+    default_db_session.add(DeviceData(device_id="cam", blob=jpeg(600, 400)))
+    default_db_session.commit()
+    hits, misses = PreviewStats.hits, PreviewStats.misses
+
+    for _ in range(2):
+        response = device_client.get("/device/cam/frame/latest?preview=true&width=150")
+        assert Image.open(io.BytesIO(cbor2.loads(response.content)["data_frame"])).width == 150
+        response = device_client.get("/device/cam/history-data/0-1?preview=true")
+        assert Image.open(io.BytesIO(cbor2.loads(response.content)[0]["data_frame"])).width == 300
+    assert PreviewStats.misses - misses == 2
+    assert PreviewStats.hits - hits == 2
+
+    default_db_session.expire_all()
+    assert default_db_session.query(DeviceData).one().preview is not None
+    assert default_db_session.query(DevicePreview).one().width == 150
+    assert device_client.get("/device/cam/frame/latest?preview=true&width=7").status_code == 422
+
+
+def test_history_keyset_pages(device_client, default_db_session):
+    start = datetime.datetime(2025, 1, 1)
+    for i in range(7):
+        default_db_session.add(
+            DeviceData(
+                device_id="cam",
+                created=start + datetime.timedelta(minutes=i),
+                blob=b"jpeg",
+                sensor_data="{}",
+            )
+        )
+    default_db_session.add(DeviceData(device_id="other", created=start, blob=b"jpeg"))
+    default_db_session.commit()
+
+    frames = []
+    cursor = None
+    for _ in range(3):
+        params = {"limit": 2, "fields": "frame_id,created", "since": "2025-01-01T00:01:00Z",
+                  "until": "2025-01-01T01:06:00+01:00"}
+        if cursor:
+            params["cursor"] = cursor
+        page = cbor2.loads(device_client.get("/device/cam/history", params=params).content)
+        frames += page["frames"]
+        cursor = page["next_cursor"]
+    assert cursor is None
+    assert [frame["frame_id"] for frame in frames] == [6, 5, 4, 3, 2]
+    assert set(frames[0]) == {"frame_id", "created"}
+
+    response = device_client.get("/device/cam/history", params={"fields": "blob"})
+    assert response.status_code == 422
+    response = device_client.get("/device/cam/history", params={"cursor": "bad"})
+    assert response.status_code == 422
+
+
+def test_projection_and_sensor_series(device_client, default_db_session):
+    start = datetime.datetime(2025, 1, 1)
+    for i in range(3):
+        default_db_session.add(
+            DeviceData(
+                device_id="cam",
+                created=start + datetime.timedelta(seconds=i),
+                blob=b"jpeg",
+                sensor_data='{"temp": %d}' % i if i else "{}",
+            )
+        )
+    default_db_session.commit()
+
+    response = device_client.get(
+        "/device/cam/frame/latest", params={"fields": "sensor_data,created"}
+    )
+    assert cbor2.loads(response.content) == {
+        "created": datetime.datetime(2025, 1, 1, 0, 0, 2, tzinfo=datetime.timezone.utc),
+        "sensor_data": '{"temp": 2}'}
+    response = device_client.get("/device/cam/history-data/0-3", params={"fields": "frame_id"})
+    assert cbor2.loads(response.content) == [{"frame_id": 3}, {"frame_id": 2}, {"frame_id": 1}]
+
+    response = device_client.get(
+        "/device/cam/sensor-series", params={"keys": "temp,hum", "limit": 2}
+    )
+    epoch = start.replace(tzinfo=datetime.timezone.utc).timestamp()
+    assert response.json() == {
+        "timestamps": [epoch + 1, epoch + 2],
+        "values": {"temp": [1, 2], "hum": [None, None]}
+    }
+
+
+def test_sensor_aggregates(device_client, default_db_session):
+    start = datetime.datetime(2025, 1, 1)
+    for i in range(3):
+        default_db_session.add(
+            DeviceData(
+                device_id="cam",
+                created=start + datetime.timedelta(minutes=i),
+                sensor_data='{"temp": %d}' % i,
+            )
+        )
+    default_db_session.commit()
+    sensor_store.extract_pending()
+
+    response = device_client.get(
+        "/device/cam/sensor-aggregates",
+        params={
+            "metric": "temp",
+            "bucket": "1m",
+            "agg": "max,count",
+            "since": "2025-01-01T00:01:00Z",
+        },
+    )
+    epoch = sensor_store.to_timestamp(start)
+    assert response.json() == {
+        "timestamps": [epoch + 60, epoch + 120],
+        "values": {"max": [1, 2], "count": [1, 1]},
+    }
+    assert device_client.get("/device/cam/sensor-aggregates",
+        params={"metric": "temp", "bucket": "1w"}).status_code == 422
+
+
+def test_offloaded_frames(device_client, default_db_session, mocker, tmp_path):
+    mocker.patch("app.settings.FRAME_STORAGE_DIR", str(tmp_path))
+    image = jpeg(600, 400)
+    default_db_session.add(DeviceData(device_id="cam", blob=image))
+    default_db_session.commit()
+    frame_store.offload_pending()
+
+    response = device_client.get("/device/cam/frame/latest/raw")
+    assert response.content == image
+    assert response.headers["content-type"] == "image/jpeg"
+    response = device_client.get("/device/cam/frame/latest")
+    assert cbor2.loads(response.content)["data_frame"] == image
+    response = device_client.get("/device/cam/frame/1/raw", params={"preview": True, "width": 150})
+    assert Image.open(io.BytesIO(response.content)).width == 150
+    assert device_client.get("/device/cam/frame/2/raw").status_code == 404
+
+
+@pytest.mark.parametrize("offload", [False, True])
+def test_raw_frame_etag_and_range(device_client, default_db_session, mocker, tmp_path, offload):
+    mocker.patch("app.settings.FRAME_STORAGE_DIR", str(tmp_path))
+    image = jpeg(60, 40)
+    default_db_session.add(DeviceData(device_id="cam", blob=image))
+    default_db_session.commit()
+    if offload:
+        frame_store.offload_pending()
+
+    response = device_client.get("/device/cam/frame/1/raw")
+    assert response.status_code == 200
+    assert response.headers["etag"] == '"frame-1"'
+    assert "immutable" in response.headers["cache-control"]
+    response = device_client.get(
+        "/device/cam/frame/latest/raw", headers={"If-None-Match": 'W/"frame-1"'}
+    )
+    assert response.status_code == 304
+    assert response.headers["cache-control"] == "private, no-cache"
+    response = device_client.get("/device/cam/frame/1/raw", params={"preview": True},
+        headers={"If-None-Match": '"frame-1"'})
+    assert response.status_code == 200
+
+    response = device_client.get("/device/cam/frame/1/raw", headers={"Range": "bytes=2-5"})
+    assert response.status_code == 206
+    assert response.content == image[2:6]
+    assert response.headers["content-range"] == "bytes 2-5/{}".format(len(image))
+    response = device_client.get("/device/cam/frame/1/raw", headers={"Range": "bytes=-4"})
+    assert response.content == image[-4:]
+    response = device_client.get("/device/cam/frame/1/raw",
+        headers={"Range": "bytes=2-5", "If-Range": '"frame-0"'})
+    assert response.status_code == 200 and response.content == image
+    response = device_client.get("/device/cam/frame/1/raw", headers={"Range": "bytes=100000-"})
+    assert response.status_code == 416
+
+
+def test_bulk_upsert_and_delete(device_client, default_db_session):
+    device = {"type": "cam", "enabled": True, "description": "gate"}
+    response = device_client.post(
+        "/device/bulk/upsert",
+        json=[
+            dict(device, id="a"),
+            dict(device, id="b"),
+            dict(device, id="a"),
+            {"id": "c", "type": "cam"},
+            5,
+        ],
+    )
+    assert response.status_code == 200
+    assert [(result["id"], result["status"]) for result in response.json()] == [
+        ("a", "created"), ("b", "created"), ("a", "error"), ("c", "error"), (None, "error")
+    ]
+
+    response = device_client.post(
+        "/device/bulk/upsert",
+        json=[
+            {
+                "id": "a",
+                "type": "cam",
+                "enabled": False,
+                "description": "door",
+                "retention_max_frames": 5,
+            },
+            dict(device, id="d"),
+        ],
+    )
+    assert [result["status"] for result in response.json()] == ["updated", "created"]
+    details = device_client.get("/device/a").json()
+    assert details["enabled"] is False and details["retention_max_frames"] == 5
+
+    response = device_client.post("/device/bulk/delete", json=["a", "x", "d"])
+    assert [result["status"] for result in response.json()] == ["deleted", "not_found", "deleted"]
+    assert [device["id"] for device in device_client.get("/device/").json()] == ["b"]
+
+
+def test_device_list_pages(device_client, default_db_session, mocker):
+    for i in range(5):
+        default_db_session.add(Device(id="dev%d" % i, type="cam" if i % 2 else "sensor",
+            enabled=True, description="gate %d" % (4 - i)))
+    default_db_session.add(Device(id="other", type="cam", enabled=False, description="door"))
+    default_db_session.commit()
+
+    response = device_client.get("/device/")
+    assert len(response.json()) == 6
+    assert "X-Next-Cursor" not in response.headers
+
+    response = device_client.get("/device/", params={"limit": 2, "count": True})
+    assert [device["id"] for device in response.json()] == ["dev0", "dev1"]
+    assert response.headers["X-Total-Count"] == "6"
+    ids = []
+    cursor = response.headers["X-Next-Cursor"]
+    while cursor:
+        response = device_client.get("/device/", params={"limit": 2, "cursor": cursor})
+        ids += [device["id"] for device in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+    assert ids == ["dev2", "dev3", "dev4", "other"]
+
+    response = device_client.get(
+        "/device/", params={"sort": "-description", "description": "gate", "limit": 3}
+    )
+    assert [device["id"] for device in response.json()] == ["dev0", "dev1", "dev2"]
+    response = device_client.get("/device/", params={
+        "sort": "-description", "description": "gate", "cursor": response.headers["X-Next-Cursor"]
+    })
+    assert [device["id"] for device in response.json()] == ["dev3", "dev4"]
+    assert "X-Next-Cursor" not in response.headers
+
+    response = device_client.get("/device/", params={"type": "cam", "enabled": True})
+    assert [device["id"] for device in response.json()] == ["dev1", "dev3"]
+
+    assert device_client.get("/device/", params={"sort": "blob"}).status_code == 422
+    assert (
+        device_client.get(
+            "/device/", params={"sort": "type", "cursor": cursor or "xx"}
+        ).status_code
+        == 422
+    )
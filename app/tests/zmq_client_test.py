@@ -0,0 +1,91 @@
+import asyncio
+import threading
+
+import pytest
+import zmq
+import zmq.asyncio
+
+from app.zmq_client import ZmqClient
+
+
+@pytest.fixture
+def rep_server(tmp_path):
+    address = "ipc://{}/rep.sock".format(tmp_path)
+    context = zmq.Context()
+    socket = context.socket(zmq.REP)
+    socket.bind(address)
+    stop = threading.Event()
+
+    def serve():
+        while not stop.is_set():
+            if not socket.poll(20):
+                continue
+            request = socket.recv()
+            if request == b"slow":
+                stop.wait(0.3)
+            socket.send(b"re:" + request)
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+    yield address
+    stop.set()
+    thread.join()
+    socket.close(0)
+    context.term()
+
+
+@pytest.mark.asyncio
+async def test_zmq_client_request(rep_server):
+    context = zmq.asyncio.Context()
+    client = ZmqClient(rep_server, 2, context)
+    try:
+        replies = await asyncio.gather(*(client.request("m%d" % i) for i in range(5)))
+        assert replies == [b"re:m%d" % i for i in range(5)]
+    finally:
+        client.close()
+        context.term()
+
+
+@pytest.mark.asyncio
+async def test_zmq_client_recovers_after_timeout(rep_server):
+    context = zmq.asyncio.Context()
+    client = ZmqClient(rep_server, 1, context)
+    try:
+        with pytest.raises(zmq.Again):
+            await client.request(b"slow", timeout=50)
+        # The late reply to "slow" must not be mistaken for this one
+        assert await client.request(b"next", timeout=1000) == b"re:next"
+    finally:
+        client.close()
+        context.term()
+
+
+@pytest.mark.asyncio
+async def test_zmq_client_cancelled_request(rep_server, mocker):
+    context = zmq.asyncio.Context()
+    client = ZmqClient(rep_server, 1, context)
+    new_socket = mocker.spy(client, "_new_socket")
+    try:
+        task = asyncio.ensure_future(client.request(b"slow", timeout=1000))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert client._idle == []
+        assert new_socket.spy_return.closed
+        assert await client.request(b"next", timeout=1000) == b"re:next"
+    finally:
+        client.close()
+        context.term()
+
+
+@pytest.mark.asyncio
+async def test_zmq_client_no_peer(tmp_path):
+    context = zmq.asyncio.Context()
+    client = ZmqClient("ipc://{}/none.sock".format(tmp_path), 1, context)
+    try:
+        with pytest.raises(zmq.ZMQError):
+            await client.request(b"ping", timeout=50)
+    finally:
+        client.close()
+        context.term()
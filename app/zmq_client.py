@@ -0,0 +1,114 @@
+# SPDX-License-Identifier: Apache-2.0
+
+# Copyright (c) 2026 Pluraf Embedded AB <code@pluraf.com>
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import asyncio
+import itertools
+
+import zmq
+import zmq.asyncio
+
+import app.settings as app_settings
+
+from app.zmq_setup import zmq_context
+
+
+# Shares the underlying context, so terminating zmq_context covers these sockets too
+async_zmq_context = zmq.asyncio.Context.shadow(zmq_context.underlying)
+
+
+class ZmqClient:
+    """Non-blocking request/reply client for a single endpoint.
+
+    Requests go over pooled DEALER sockets. Each request carries an id frame
+    in its envelope, which REP peers echo back, so replies arriving after a
+    timeout are recognized and dropped instead of breaking the next exchange.
+    """
+
+    def __init__(self, address, pool_size, context=None):
+        self.address = address
+        self.pool_size = pool_size
+        self._context = context or async_zmq_context
+        self._ids = itertools.count(1)
+        self._idle = []
+        self._loop = None
+        self._slots = None
+
+    def _bind_loop(self):
+        # asyncio sockets and semaphores belong to the loop that created them
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self.close()
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.pool_size)
+
+    def _new_socket(self):
+        socket = self._context.socket(zmq.DEALER)
+        socket.setsockopt(zmq.LINGER, 0)
+        socket.setsockopt(zmq.IMMEDIATE, 1)
+        socket.connect(self.address)
+        return socket
+
+    async def _exchange(self, socket, request):
+        request_id = next(self._ids).to_bytes(8, "big")
+        await socket.send_multipart([request_id, b"", request])
+        while True:
+            frames = await socket.recv_multipart()
+            if len(frames) == 3 and frames[0] == request_id and frames[1] == b"":
+                return frames[2]
+
+    async def request(self, request, timeout=200):
+        request = request if type(request) == bytes else request.encode()
+        self._bind_loop()
+        async with self._slots:
+            socket = self._idle.pop() if self._idle else self._new_socket()
+            reusable = False
+            try:
+                reply = await asyncio.wait_for(self._exchange(socket, request), timeout / 1000)
+                reusable = True
+                return reply
+            except asyncio.TimeoutError:
+                reusable = True
+                raise zmq.Again()
+            finally:
+                # Drop broken or cancelled sockets, the next request gets a fresh one
+                if reusable:
+                    self._idle.append(socket)
+                else:
+                    socket.close()
+
+    def close(self):
+        while self._idle:
+            self._idle.pop().close()
+
+
+_clients = {}
+
+
+def get_zmq_client(address):
+    client = _clients.get(address)
+    if client is None:
+        client = _clients[address] = ZmqClient(address, app_settings.ZMQ_POOL_SIZE)
+    return client
+
+
+async def zmq_request(address, request, timeout=200):
+    return await get_zmq_client(address).request(request, timeout)
+
+
+def close_zmq_clients():
+    for client in _clients.values():
+        client.close()